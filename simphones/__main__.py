@@ -3,52 +3,193 @@
 # See https://www.gnu.org/licenses/gpl-3.0.en.html
 """Compute similarity between sounds using PHOIBLE allophone data."""
 
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentParser, BooleanOptionalAction, Namespace
+from functools import partial
+from importlib import import_module
 from pathlib import Path
+import sys
 
-from simphones.distances import compute_distances
+from simphones.distances import create_allophone_graph, graph_distances
 from simphones.inventories import get_phonological_inventories
+from simphones.rules import RuleEngine
 from simphones.similarity import compute_similarity
-from simphones.utils import save_as_csv, save_as_json
+from simphones.utils import (
+    OutputJob,
+    Writer,
+    save_all,
+    save_as_shards,
+    writers,
+)
 
 
-def parse_args() -> Namespace:
+# Subcommands that work on existing output files.
+# The modules are only imported when needed, to keep startup fast.
+subcommands = {
+    "query": ("simphones.query", "Look up scores in a simphones output file."),
+    "serve": ("simphones.server", "Serve lookups from an output file."),
+}
+
+
+def parse_precision(text: str) -> int | None:
+    """Parse precision argument ("none" means don't round)."""
+    if text.lower() == "none":
+        return None
+    return int(text)
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
     """Parse command-line arguments."""
-    parser = ArgumentParser(prog="simphones", description=__doc__)
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in subcommands:
+        command = argv[0]
+        module, description = subcommands[command]
+        parser = ArgumentParser(
+            prog=f"simphones {command}",
+            description=description,
+        )
+        import_module(module).add_arguments(parser)
+        return parser.parse_args(argv[1:], Namespace(command=command))
+
+    parser = ArgumentParser(
+        prog="simphones",
+        description=__doc__,
+        epilog=(
+            "See `simphones query -h` and `simphones serve -h` for using"
+            " existing output files."
+        ),
+    )
     parser.add_argument(
         "-f",
-        dest="format",
-        default="csv",
-        choices=["csv", "json"],
+        dest="formats",
+        action="append",
+        choices=sorted(writers),
         type=str,
-        help="output format (default: csv)",
+        help=(
+            "output format (default: csv);"
+            " repeat once per output file to write several formats"
+        ),
     )
     parser.add_argument(
         "-n",
-        dest="precision",
-        default=None,
-        type=int,
+        dest="precisions",
+        action="append",
+        type=parse_precision,
         help=(
             "number of decimal digits to round similarity scores to"
-            " (default: don't round)"
+            " (default: don't round);"
+            " repeat once per output file, use 'none' to not round"
+        ),
+    )
+    parser.add_argument(
+        "--shards",
+        dest="shards",
+        default=16,
+        type=int,
+        help="number of shards of `-f shards` outputs (default: 16)",
+    )
+    parser.add_argument(
+        "--store",
+        dest="store",
+        default=None,
+        type=Path,
+        help=(
+            "read preprocessed PHOIBLE data from a store directory"
+            " (see `python -m simphones.store -h`);"
+            " --validate only checks the graph and the scores of stores"
+        ),
+    )
+    parser.add_argument(
+        "--rules",
+        dest="rules",
+        default=None,
+        type=Path,
+        help=(
+            "JSON file of rules for parsing PHOIBLE segments"
+            " (see `simphones.rules`)"
+        ),
+    )
+    parser.add_argument(
+        "--validate",
+        dest="validate",
+        default=True,
+        action=BooleanOptionalAction,
+        help=(
+            "check the inventories, the allophone graph and the scores before"
+            " writing anything"
         ),
     )
     parser.add_argument(
-        "output",
+        "outputs",
+        nargs="+",
         type=Path,
-        help="output file",
+        help="output files",
     )
-    return parser.parse_args()
+    args = parser.parse_args(argv, Namespace(command="generate"))
+
+    # A single -f or -n applies to every output file.
+    count = len(args.outputs)
+    formats = args.formats or ["csv"]
+    precisions = args.precisions or [None]
+    if len(formats) == 1:
+        formats *= count
+    if len(precisions) == 1:
+        precisions *= count
+    if len(formats) != count or len(precisions) != count:
+        parser.error("expected one -f and -n, or one per output file")
+    if args.shards < 1:
+        parser.error("expected at least one shard")
+    if args.store is not None and args.rules is not None:
+        parser.error(
+            "--rules can't be used with --store, because the store was"
+            " parsed with the default rules"
+        )
+
+    args.jobs = [
+        OutputJob(kind, path, ndigits)
+        for kind, path, ndigits in zip(formats, args.outputs, precisions)
+    ]
+    return args
 
 
 def main(args: Namespace) -> None:
     """Script entrypoint."""
-    inventories = get_phonological_inventories()
-    similarity = compute_similarity(compute_distances(inventories))
-    if args.format == "csv":
-        save_as_csv(args.output, similarity, args.precision)
-    elif args.format == "json":
-        save_as_json(args.output, similarity, args.precision)
+    if args.command in subcommands:
+        module, _ = subcommands[args.command]
+        import_module(module).main(args)
+        return
+
+    report = None
+    if args.validate:
+        # pylint: disable-next=import-outside-toplevel
+        from simphones.validate import Report
+        report = Report()
+
+    if args.store is not None:
+        # pylint: disable-next=import-outside-toplevel
+        from simphones import store
+
+        graph = store.create_allophone_graph(store.load_store(args.store))
+    else:
+        rules = None
+        if args.rules is not None:
+            rules = RuleEngine.from_file(args.rules)
+        inventories = get_phonological_inventories(rules=rules)
+        if report is not None:
+            report.check_inventories(inventories)
+        graph = create_allophone_graph(inventories)
+
+    if report is not None:
+        report.check_graph(graph)
+    similarity = compute_similarity(graph_distances(graph))
+    if report is not None:
+        report.check_similarity(similarity)
+        if not report.ok():
+            raise SystemExit(f"invalid data:\n{report}")
+    formats: dict[str, Writer] = {
+        **writers,
+        "shards": partial(save_as_shards, shards=args.shards),
+    }
+    save_all(similarity, args.jobs, formats=formats)
 
 
 if __name__ == "__main__":
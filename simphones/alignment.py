@@ -0,0 +1,281 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Weighted edit distance between phone sequences.
+
+Substitution costs are `1 - similarity`, and insertions and deletions have a
+constant cost.
+"""
+
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+
+from simphones.inventories import Phone
+from simphones.parallel import pool_map
+from simphones.similarity import SimilarityData
+
+
+Sequence: t.TypeAlias = t.Sequence[Phone]
+Alignment: t.TypeAlias = list[tuple[Phone | None, Phone | None]]
+Array: t.TypeAlias = npt.NDArray[np.float64]
+IdArray: t.TypeAlias = npt.NDArray[np.int32]
+
+
+class SubstitutionMatrix:
+    """Dense matrix of substitution costs between interned phones.
+
+    Phones that aren't in the similarity data get interned on first use.
+    Like missing pairs in the data, they have similarity 0 with every other
+    phone.
+    """
+
+    def __init__(self, similarity: SimilarityData, indel: float = 1.0) -> None:
+        phones = sorted({phone for pair in similarity for phone in pair})
+        self.indel = indel
+        self.phones: list[Phone] = phones
+        self.ids = {phone: index for index, phone in enumerate(phones)}
+
+        n = len(phones)
+        self.costs: Array = np.ones((n, n))
+        for (phone1, phone2), score in similarity.items():
+            i = self.ids[phone1]
+            j = self.ids[phone2]
+            self.costs[i, j] = self.costs[j, i] = 1 - score
+        np.fill_diagonal(self.costs, 0)
+
+    def extend(self, phones: t.Iterable[Phone]) -> None:
+        """Intern new phones."""
+        new = sorted(set(phones).difference(self.ids))
+        if not new:
+            return
+
+        n = len(self.phones)
+        for index, phone in enumerate(new, start=n):
+            self.ids[phone] = index
+        self.phones.extend(new)
+
+        m = len(self.phones)
+        costs = np.ones((m, m))
+        costs[:n, :n] = self.costs
+        costs[range(n, m), range(n, m)] = 0
+        self.costs = costs
+
+    def encode(self, sequence: Sequence) -> IdArray:
+        """Convert phone sequence into array of phone IDs."""
+        return self.encode_all([sequence])[0]
+
+    def encode_all(self, sequences: t.Iterable[Sequence]) -> list[IdArray]:
+        """Convert phone sequences into arrays of phone IDs.
+
+        New phones in the whole batch are interned at once, so that the cost
+        matrix gets copied at most once.
+        """
+        sequences = list(sequences)
+        self.extend(phone for sequence in sequences for phone in sequence)
+        return [
+            np.fromiter(
+                (self.ids[phone] for phone in sequence),
+                dtype=np.int32,
+                count=len(sequence),
+            )
+            for sequence in sequences
+        ]
+
+
+def pad(sequences: list[IdArray]) -> tuple[IdArray, IdArray]:
+    """Stack ID arrays into a matrix, padded with 0.
+
+    Also returns the length of each sequence.
+    """
+    lengths = np.array([len(sequence) for sequence in sequences], np.int32)
+    padded = np.zeros((len(sequences), max(lengths, default=0)), np.int32)
+    for row, sequence in zip(padded, sequences):
+        row[:len(sequence)] = sequence
+    return padded, lengths
+
+
+def next_row(
+    substitutions: Array,
+    indel: float,
+    previous: Array,
+    i: int,
+) -> Array:
+    """Compute the next row of the edit distance table of a batch of targets.
+
+    `previous` has shape `(batch size, target length + 1)`, and
+    `substitutions` has the cost of substituting the `i`th phone of the query
+    for each target phone.
+    Substitutions and deletions only depend on the previous row, so they're
+    computed in one step.
+    Insertions depend on the left cell in the same row, but since they have a
+    constant cost, `row[j] = min(row[k] + (j - k) * indel for k <= j)`,
+    which is a cumulative minimum.
+    """
+    row = np.empty_like(previous)
+    row[:, 0] = i * indel
+    np.minimum(
+        previous[:, :-1] + substitutions,
+        previous[:, 1:] + indel,
+        out=row[:, 1:],
+    )
+    offsets = indel * np.arange(row.shape[1])
+    row -= offsets
+    np.minimum.accumulate(row, axis=1, out=row)
+    row += offsets
+    return row
+
+
+def batch_distances(
+    costs: Array,
+    indel: float,
+    query: IdArray,
+    targets: IdArray,
+    lengths: IdArray,
+) -> Array:
+    """Compute edit distance between query and padded targets."""
+    batch, width = targets.shape
+    row = np.tile(indel * np.arange(width + 1, dtype=np.float64), (batch, 1))
+    for i, phone in enumerate(query, start=1):
+        row = next_row(costs[phone, targets], indel, row, i)
+    return row[np.arange(batch), lengths]
+
+
+def edit_distance(
+    matrix: SubstitutionMatrix,
+    first: Sequence,
+    second: Sequence,
+) -> float:
+    """Compute weighted edit distance between two phone sequences."""
+    return float(one_vs_many(matrix, first, [second])[0])
+
+
+def one_vs_many(
+    matrix: SubstitutionMatrix,
+    query: Sequence,
+    targets: t.Iterable[Sequence],
+) -> Array:
+    """Compute edit distance between query and every target sequence."""
+    encoded, *rest = matrix.encode_all([query, *targets])
+    padded, lengths = pad(rest)
+    return batch_distances(
+        matrix.costs,
+        matrix.indel,
+        encoded,
+        padded,
+        lengths,
+    )
+
+
+# Shared state of worker processes in `many_vs_many`
+_worker: dict[str, t.Any] = {}
+
+
+def _init_worker(
+    costs: Array,
+    indel: float,
+    targets: IdArray,
+    lengths: IdArray,
+) -> None:
+    _worker.update(costs=costs, indel=indel, targets=targets, lengths=lengths)
+
+
+def _compute_rows(queries: list[IdArray]) -> Array:
+    return np.array([
+        batch_distances(
+            _worker["costs"],
+            _worker["indel"],
+            query,
+            _worker["targets"],
+            _worker["lengths"],
+        )
+        for query in queries
+    ])
+
+
+def many_vs_many(
+    matrix: SubstitutionMatrix,
+    queries: t.Iterable[Sequence],
+    targets: t.Iterable[Sequence],
+    processes: int | None = 1,
+    chunksize: int = 64,
+) -> Array:
+    """Compute edit distance between every query and every target.
+
+    Returns a matrix with a row for each query and a column for each target.
+    Set `processes` to use a process pool (`None` uses every CPU).
+    """
+    queries = list(queries)
+    everything = matrix.encode_all([*queries, *targets])
+    encoded = everything[:len(queries)]
+    padded, lengths = pad(everything[len(queries):])
+    args = (matrix.costs, matrix.indel, padded, lengths)
+    chunks = [
+        encoded[start:start+chunksize]
+        for start in range(0, len(encoded), chunksize)
+    ]
+
+    rows = list(
+        pool_map(
+            _compute_rows,
+            chunks,
+            initializer=_init_worker,
+            initargs=args,
+            processes=processes,
+            finalizer=_worker.clear,
+        )
+    )
+
+    if not rows:
+        return np.zeros((0, len(lengths)))
+    return np.concatenate(rows).reshape(len(encoded), len(lengths))
+
+
+def align(
+    matrix: SubstitutionMatrix,
+    first: Sequence,
+    second: Sequence,
+) -> tuple[float, Alignment]:
+    """Compute edit distance and an optimal alignment of two sequences.
+
+    In the alignment, `None` stands for a gap.
+    """
+    query, target = matrix.encode_all([first, second])
+    costs = matrix.costs
+    indel = matrix.indel
+
+    table = np.empty((len(query) + 1, len(target) + 1))
+    table[0] = indel * np.arange(len(target) + 1)
+    for i, phone in enumerate(query, start=1):
+        table[i] = next_row(costs[phone, target], indel, table[i-1:i], i)[0]
+
+    alignment: Alignment = []
+    i, j = len(query), len(target)
+    while i > 0 or j > 0:
+        if (
+            i > 0 and j > 0
+            and np.isclose(
+                table[i, j],
+                table[i-1, j-1] + costs[query[i-1], target[j-1]],
+            )
+        ):
+            alignment.append((first[i-1], second[j-1]))
+            i, j = i - 1, j - 1
+        elif i > 0 and np.isclose(table[i, j], table[i-1, j] + indel):
+            alignment.append((first[i-1], None))
+            i -= 1
+        else:
+            alignment.append((None, second[j-1]))
+            j -= 1
+    alignment.reverse()
+    return float(table[-1, -1]), alignment
+
+
+__all__ = [
+    "SubstitutionMatrix",
+    "align",
+    "edit_distance",
+    "many_vs_many",
+    "one_vs_many",
+]
@@ -0,0 +1,386 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Bootstrap confidence intervals of similarity scores.
+
+Each bootstrap sample resamples the languages with replacement, and
+recomputes the allophone graph, the distances and the similarity scores.
+"""
+
+from argparse import ArgumentParser, Namespace
+from csv import writer
+from itertools import combinations
+from pathlib import Path
+from statistics import NormalDist
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+
+from simphones.distances import Cooccurrence, graph_distances, unordered
+from simphones.inventories import (
+    InventoryDataset,
+    LanguageCode,
+    Phone,
+    get_phonological_inventories,
+)
+from simphones.parallel import pool_map
+from simphones.similarity import SimilarityData, compute_similarity
+
+if t.TYPE_CHECKING:
+    import networkx as nx   # type: ignore
+
+
+Array: t.TypeAlias = npt.NDArray[np.float64]
+IdArray: t.TypeAlias = npt.NDArray[np.int32]
+
+
+class Incidence:
+    """Sparse incidence matrices between languages and phones/phone pairs.
+
+    Each matrix is stored as parallel arrays of row IDs (phones or edges) and
+    column IDs (languages), so that the counts for any weighting of the
+    languages are just a weighted `np.bincount`.
+    With every weight set to 1, the counts are the same as the counts in
+    `simphones.distances`.
+    """
+
+    def __init__(self, inventories: InventoryDataset) -> None:
+        self.languages: list[LanguageCode] = list(inventories)
+        self.combined = (
+            self.languages.index("*") if "*" in self.languages else None
+        )
+        self.phones: list[Phone] = sorted({
+            phone for inventory in inventories.values() for phone in inventory
+        })
+        ids = {phone: index for index, phone in enumerate(self.phones)}
+
+        edges = sorted({
+            (phone, allophone)
+            for inventory in inventories.values()
+            for phone, allophones in inventory.items()
+            for allophone in allophones
+            if phone < allophone
+        })
+        edge_ids = {edge: index for index, edge in enumerate(edges)}
+        self.edges = np.array(
+            [(ids[a], ids[b]) for a, b in edges],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+
+        self.phone_entries = as_entries(
+            (ids[phone], column)
+            for column, inventory in enumerate(inventories.values())
+            for phone in inventory
+        )
+        self.allophone_entries = as_entries(
+            (edge_ids[(phone, allophone)], column)
+            for column, inventory in enumerate(inventories.values())
+            for phone, allophones in inventory.items()
+            for allophone in allophones
+            if phone < allophone
+        )
+        self.cooccurrence_entries = as_entries(
+            (edge_ids[pair], column)
+            for column, inventory in enumerate(inventories.values())
+            for pair in combinations(sorted(inventory), 2)
+            if pair in edge_ids
+        )
+
+    def counts(
+        self,
+        entries: IdArray,
+        weights: Array,
+        size: int,
+    ) -> Array:
+        """Count weighted languages for each row of the incidence matrix."""
+        counts = np.bincount(
+            entries[:, 0],
+            weights=weights[entries[:, 1]],
+            minlength=size,
+        )
+        return t.cast(Array, counts)
+
+    def weighted_counts(self, weights: Array) -> tuple[Array, Array, Array]:
+        """Count weighted languages for each phone, and the allophone and
+        cooccurrence counts of each edge.
+        """
+        return (
+            self.counts(self.phone_entries, weights, len(self.phones)),
+            self.counts(self.allophone_entries, weights, len(self.edges)),
+            self.counts(self.cooccurrence_entries, weights, len(self.edges)),
+        )
+
+    def combined_counts(self, weights: Array) -> tuple[Array, Array, Array]:
+        """Same as `weighted_counts`, but with a combined inventory rebuilt
+        from the weighted languages.
+
+        The combined inventory has every phone, allophone and cooccurrence
+        that appears in at least one of the languages, like "*" in
+        `get_phonological_inventories`, so the weight of "*" itself should
+        be 0.
+        """
+        phones, allophones, cooccurrences = (
+            count + (count > 0) for count in self.weighted_counts(weights)
+        )
+        return phones, allophones, cooccurrences
+
+    def graph(self, weights: Array) -> "nx.Graph":
+        """Create allophone graph from weighted language counts.
+
+        See `simphones.distances.create_allophone_graph`.
+        """
+        return self.graph_from_counts(*self.weighted_counts(weights))
+
+    def graph_from_counts(
+        self,
+        phones: Array,
+        allophones: Array,
+        cooccurrences: Array,
+    ) -> "nx.Graph":
+        """Create allophone graph from the counts in `weighted_counts`."""
+        # pylint: disable-next=import-outside-toplevel
+        import networkx as nx
+
+        present = allophones > 0
+        a = self.edges[present, 0]
+        b = self.edges[present, 1]
+        count = allophones[present]
+        union = phones[a] + phones[b] - cooccurrences[present]
+        edge_weights = 1 - count/union
+
+        graph = nx.Graph()
+        graph.add_weighted_edges_from(
+            (self.phones[i], self.phones[j], weight)
+            for i, j, weight in zip(a.tolist(), b.tolist(), edge_weights)
+        )
+        return graph
+
+
+def as_entries(entries: t.Iterable[tuple[int, int]]) -> IdArray:
+    """Convert (row, column) pairs into an array."""
+    return np.array(list(entries), dtype=np.int32).reshape(-1, 2)
+
+
+class Accumulator:
+    """Running mean and variance of score vectors (Welford's algorithm)."""
+
+    def __init__(self, size: int) -> None:
+        self.count = 0
+        self.mean: Array = np.zeros(size)
+        self.m2: Array = np.zeros(size)
+
+    def add(self, values: Array) -> None:
+        """Include sample."""
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+
+    def merge(self, other: "Accumulator") -> None:
+        """Include samples of another accumulator (Chan et al.)."""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+
+    def std(self) -> Array:
+        """Return sample standard deviation."""
+        if self.count < 2:
+            return np.zeros_like(self.m2)
+        return t.cast(Array, np.sqrt(self.m2 / (self.count - 1)))
+
+
+class BootstrapResult(t.NamedTuple):
+    """Mean and standard deviation of the similarity score of each pair over
+    the bootstrap samples.
+    """
+    pairs: list[Cooccurrence]
+    samples: int
+    mean: Array
+    std: Array
+
+    def intervals(
+        self,
+        confidence: float = 0.95,
+    ) -> dict[Cooccurrence, tuple[float, float]]:
+        """Return normal-approximation confidence intervals, clipped to
+        [0, 1].
+        """
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        low = np.clip(self.mean - z * self.std, 0, 1)
+        high = np.clip(self.mean + z * self.std, 0, 1)
+        return dict(zip(self.pairs, zip(low.tolist(), high.tolist())))
+
+
+def resample(
+    incidence: Incidence,
+    rng: np.random.Generator,
+) -> Array:
+    """Draw a bootstrap sample of languages as a weight vector.
+
+    The combined inventory ("*") is never drawn, because it gets rebuilt from
+    the sample (see `sample_similarity`).
+    """
+    languages = incidence.languages
+    candidates = [
+        i for i in range(len(languages)) if i != incidence.combined
+    ]
+
+    draws = rng.choice(candidates, size=len(candidates), replace=True)
+    return np.bincount(draws, minlength=len(languages)).astype(np.float64)
+
+
+def sample_similarity(incidence: Incidence, weights: Array) -> SimilarityData:
+    """Compute similarity scores for weighted languages.
+
+    The weight of "*" is ignored, and the combined inventory is rebuilt from
+    the weighted languages instead.
+    """
+    if incidence.combined is not None:
+        weights = weights.copy()
+        weights[incidence.combined] = 0
+    graph = incidence.graph_from_counts(*incidence.combined_counts(weights))
+    return compute_similarity(graph_distances(graph))
+
+
+# Shared state of worker processes
+_worker: dict[str, t.Any] = {}
+
+
+def _init_worker(
+    incidence: Incidence,
+    pairs: dict[Cooccurrence, int],
+) -> None:
+    _worker.update(incidence=incidence, pairs=pairs)
+
+
+def _run_samples(seed: np.random.SeedSequence, samples: int) -> Accumulator:
+    incidence: Incidence = _worker["incidence"]
+    pairs: dict[Cooccurrence, int] = _worker["pairs"]
+
+    rng = np.random.default_rng(seed)
+    accumulator = Accumulator(len(pairs))
+    for _ in range(samples):
+        similarity = sample_similarity(incidence, resample(incidence, rng))
+
+        # Missing pairs have similarity 0.
+        values = np.zeros(len(pairs))
+        for pair, score in similarity.items():
+            index = pairs.get(pair)
+            if index is not None:
+                values[index] = score
+        accumulator.add(values)
+    return accumulator
+
+
+def bootstrap(
+    inventories: InventoryDataset,
+    samples: int = 1000,
+    processes: int | None = None,
+    seed: int = 0,
+    chunksize: int = 10,
+) -> BootstrapResult:
+    """Compute mean and standard deviation of similarity scores over
+    bootstrap samples of languages.
+
+    Samples are split into chunks that run in a process pool (`None` uses
+    every CPU).
+    Each chunk gets its own random seed, so the result doesn't depend on the
+    number of processes.
+    Workers only keep running sums, so memory doesn't grow with the number of
+    samples.
+    """
+    incidence = Incidence(inventories)
+    weights = np.ones(len(incidence.languages))
+    pairs = sorted(
+        unordered(a, b)
+        for a, b in sample_similarity(incidence, weights)
+        if a != b
+    )
+    pair_ids = {pair: index for index, pair in enumerate(pairs)}
+
+    chunks = [
+        min(chunksize, samples - start)
+        for start in range(0, samples, chunksize)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    total = Accumulator(len(pairs))
+    accumulators = pool_map(
+        _run_samples,
+        seeds,
+        chunks,
+        initializer=_init_worker,
+        initargs=(incidence, pair_ids),
+        processes=processes,
+        finalizer=_worker.clear,
+    )
+    for accumulator in accumulators:
+        total.merge(accumulator)
+    return BootstrapResult(pairs, total.count, total.mean, total.std())
+
+
+def parse_args() -> Namespace:
+    """Parse command-line arguments."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-B",
+        dest="samples",
+        default=1000,
+        type=int,
+        help="number of bootstrap samples (default: 1000)",
+    )
+    parser.add_argument(
+        "-c",
+        dest="confidence",
+        default=0.95,
+        type=float,
+        help="confidence level (default: 0.95)",
+    )
+    parser.add_argument(
+        "-p",
+        dest="processes",
+        default=None,
+        type=int,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-s",
+        dest="seed",
+        default=0,
+        type=int,
+        help="random seed (default: 0)",
+    )
+    parser.add_argument(
+        "output",
+        type=Path,
+        help="output CSV file (phone1, phone2, mean, low, high)",
+    )
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    """Script entrypoint."""
+    result = bootstrap(
+        get_phonological_inventories(),
+        samples=args.samples,
+        processes=args.processes,
+        seed=args.seed,
+    )
+    intervals = result.intervals(args.confidence)
+    with open(args.output, "w", encoding="utf-8") as file:
+        csv_file = writer(file)
+        for pair, mean in zip(result.pairs, result.mean.tolist()):
+            low, high = intervals[pair]
+            csv_file.writerow((*pair, mean, low, high))
+
+
+if __name__ == "__main__":
+    main(parse_args())
+
+
+__all__ = ["BootstrapResult", "Incidence", "bootstrap"]
@@ -0,0 +1,49 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Size-bounded cache."""
+
+from collections import OrderedDict
+import typing as t
+
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+
+class LRUCache(t.Generic[K, V]):
+    """Cache that evicts the least recently used entry when full."""
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: K, compute: t.Callable[[], V]) -> V:
+        """Return cached value, or compute and cache it if it's missing."""
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        value = compute()
+        if self.maxsize > 0:
+            self.entries[key] = value
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self.entries.clear()
+
+
+__all__ = ["LRUCache"]
@@ -8,20 +8,53 @@
 from collections import Counter
 import typing as t
 
-import networkx as nx   # type: ignore
-
 from simphones.inventories import InventoryDataset, Phone
 
+if t.TYPE_CHECKING:
+    # networkx is slow to import, so it only gets imported when the distances
+    # are actually computed.
+    import networkx as nx   # type: ignore
+
 
 Cooccurrence: t.TypeAlias = tuple[Phone, Phone]
 DistanceData: t.TypeAlias = dict[Cooccurrence, float]
 
 
-def compute_distances(inventories: InventoryDataset) -> DistanceData:
-    """Compute distance for every pair of sounds."""
-    graph = create_allophone_graph(inventories)
+def compute_distances(
+    inventories: InventoryDataset,
+    landmarks: int | None = None,
+    candidates: int = 10,
+) -> DistanceData:
+    """Compute distance for every pair of sounds.
 
-    assert not [node for node, degree in graph.degree() if degree == 0]
+    See `graph_distances` for `landmarks` and `candidates`.
+    """
+    return graph_distances(
+        create_allophone_graph(inventories),
+        landmarks=landmarks,
+        candidates=candidates,
+    )
+
+
+def graph_distances(
+    graph: "nx.Graph",
+    landmarks: int | None = None,
+    candidates: int = 10,
+) -> DistanceData:
+    """Compute distance for every pair of nodes in the allophone graph.
+
+    If `landmarks` is set, the distances are approximated using that many
+    landmarks, and only the `candidates` nearest neighbors of each node are
+    exact (see `simphones.landmarks`).
+    Modifies the graph.
+    See `simphones.validate` for checks of the graph.
+    """
+    if landmarks is not None:
+        # Check before the graph gets modified.
+        # pylint: disable-next=import-outside-toplevel
+        from simphones.landmarks import check_parameters
+
+        check_parameters(landmarks, candidates)
 
     # Temporarily remove nodes of degree 1 to reduce the size of the graph for
     # the next step.
@@ -29,14 +62,18 @@ def compute_distances(inventories: InventoryDataset) -> DistanceData:
     for node, degree in graph.degree():
         if degree == 1:
             neighbor = next(graph.neighbors(node))
-            assert node != neighbor
-
             weight = graph.edges[(node, neighbor)]["weight"]
             backup.add((node, neighbor, weight))
     graph.remove_nodes_from(node for node, _, _ in backup)
 
     # Compute shortest path lengths between sounds.
-    distances = shortest_path_lengths(graph)
+    if landmarks is None:
+        distances = shortest_path_lengths(graph)
+    else:
+        # pylint: disable-next=import-outside-toplevel
+        from simphones.landmarks import landmark_distances
+
+        distances = landmark_distances(graph, landmarks, candidates)
 
     # Compute distances for removed edges.
     for node, neighbor, weight in backup:
@@ -60,15 +97,29 @@ def compute_distances(inventories: InventoryDataset) -> DistanceData:
     return distances
 
 
-def create_allophone_graph(inventories: InventoryDataset) -> nx.Graph:
+def create_allophone_graph(inventories: InventoryDataset) -> "nx.Graph":
     """Create a weighted graph of allophones.
 
     Nodes represent phones. Two nodes are connected if they are allophones in
     some language. The edge weight equals the "distance" between the two
     phones.
     """
-    cooccurrences = count_cooccurrences(inventories)
-    allophones = count_allophones(inventories)
+    return allophone_graph(
+        count_allophones(inventories),
+        count_cooccurrences(inventories),
+    )
+
+
+def allophone_graph(
+    allophones: Counter[Cooccurrence],
+    cooccurrences: Counter[Cooccurrence],
+) -> "nx.Graph":
+    """Create a weighted graph of allophones from precomputed counts.
+
+    See `count_allophones` and `count_cooccurrences`.
+    """
+    import networkx as nx   # pylint: disable=import-outside-toplevel
+
     graph = nx.Graph()
 
     for (a, b), count in allophones.most_common():
@@ -77,12 +128,7 @@ def create_allophone_graph(inventories: InventoryDataset) -> nx.Graph:
 
         count_a = allophones[(a, a)]
         count_b = allophones[(b, b)]
-
-        assert count_a == cooccurrences[(a, a)]
-        assert count_b == cooccurrences[(b, b)]
-
         weight = 1 - count/(count_a + count_b - cooccurrences[(a, b)])
-        assert 0 <= weight <= 1
         graph.add_edge(a, b, weight=weight)
     return graph
 
@@ -124,16 +170,13 @@ def count_allophones(inventories: InventoryDataset) -> Counter[Cooccurrence]:
     counter: Counter[Cooccurrence] = Counter()
     for inventory in inventories.values():
         for phone, allophones in inventory.items():
-            assert phone in allophones  # Check symmetry.
-
             for allophone in allophones:
-                assert allophone in inventory   # Check symmetry.
                 if phone <= allophone:
                     counter[(phone, allophone)] += 1
     return counter
 
 
-def shortest_path_lengths(graph: nx.Graph) -> dict[Cooccurrence, float]:
+def shortest_path_lengths(graph: "nx.Graph") -> dict[Cooccurrence, float]:
     """Compute length of shortest path between every pair of nodes.
 
     The return value is a dictionary keyed by tuples of graph nodes.
@@ -141,6 +184,8 @@ def shortest_path_lengths(graph: nx.Graph) -> dict[Cooccurrence, float]:
     nodes.
     Assume `phone1 <= phone2` if `(phone1, phone2)` is in the dictionary.
     """
+    import networkx as nx   # pylint: disable=import-outside-toplevel
+
     result = {}
     distances = nx.all_pairs_dijkstra_path_length(graph)
 
@@ -0,0 +1,150 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Explain distances between phones with paths in the allophone graph."""
+
+from argparse import ArgumentParser, Namespace
+import typing as t
+
+from simphones.cache import LRUCache
+from simphones.distances import (
+    Cooccurrence,
+    create_allophone_graph,
+    unordered,
+)
+from simphones.inventories import (
+    InventoryDataset,
+    LanguageCode,
+    Phone,
+    get_phonological_inventories,
+)
+from simphones.normalize import normalize_ipa
+
+
+Predecessors: t.TypeAlias = dict[Phone, list[Phone]]
+
+
+class Step(t.NamedTuple):
+    """Edge in the allophone graph.
+
+    `languages` are the languages in which the phones are allophones.
+    """
+    source: Phone
+    target: Phone
+    weight: float
+    languages: list[LanguageCode]
+
+
+class Explanation(t.NamedTuple):
+    """Shortest path between two phones in the allophone graph.
+
+    The similarity score of the pair is `1 - distance / max_distance`, where
+    `max_distance` is the largest distance in the dataset.
+    """
+    path: list[Phone]
+    distance: float
+    steps: list[Step]
+
+
+class Explainer:
+    """Compute shortest paths on demand.
+
+    Instead of storing predecessors for every pair of phones, single-source
+    predecessor trees are computed when needed, and the `cache_size` most
+    recently used trees are kept.
+    """
+
+    def __init__(
+        self,
+        inventories: InventoryDataset,
+        cache_size: int = 64,
+    ) -> None:
+        self.graph = create_allophone_graph(inventories)
+        self.trees: LRUCache[Phone, tuple[Predecessors, dict[Phone, float]]]
+        self.trees = LRUCache(cache_size)
+
+        self.languages: dict[Cooccurrence, list[LanguageCode]] = {}
+        for code, inventory in inventories.items():
+            if code == "*":
+                continue
+            for phone, allophones in inventory.items():
+                for allophone in allophones:
+                    if phone < allophone:
+                        edge = (phone, allophone)
+                        self.languages.setdefault(edge, []).append(code)
+
+    def tree(self, source: Phone) -> tuple[Predecessors, dict[Phone, float]]:
+        """Return shortest path predecessors and distances from source."""
+        # pylint: disable-next=import-outside-toplevel
+        import networkx as nx   # type: ignore
+
+        return self.trees.get(
+            source,
+            lambda: nx.dijkstra_predecessor_and_distance(self.graph, source),
+        )
+
+    def explain(self, phone1: Phone, phone2: Phone) -> Explanation | None:
+        """Explain the distance between two phones.
+
+        Returns `None` if there's no path between the phones.
+        """
+        phone1 = normalize_ipa(phone1)
+        phone2 = normalize_ipa(phone2)
+        if phone1 not in self.graph or phone2 not in self.graph:
+            return None
+
+        # The graph is undirected, so a cached tree from either phone works.
+        source, target = phone1, phone2
+        if phone1 not in self.trees and phone2 in self.trees:
+            source, target = phone2, phone1
+
+        predecessors, distances = self.tree(source)
+        if target not in distances:
+            return None
+
+        # Walk back from the target, then orient the path from phone1.
+        path = [target]
+        while path[-1] != source:
+            path.append(predecessors[path[-1]][0])
+        if source == phone1:
+            path.reverse()
+
+        steps = [
+            Step(
+                a,
+                b,
+                self.graph.edges[(a, b)]["weight"],
+                sorted(self.languages.get(unordered(a, b), [])),
+            )
+            for a, b in zip(path, path[1:])
+        ]
+        return Explanation(path, distances[target], steps)
+
+
+def parse_args() -> Namespace:
+    """Parse command-line arguments."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("phone1", help="first phone")
+    parser.add_argument("phone2", help="second phone")
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    """Script entrypoint."""
+    explainer = Explainer(get_phonological_inventories())
+    explanation = explainer.explain(args.phone1, args.phone2)
+    if explanation is None:
+        print("No path.")
+        return
+
+    print(f"distance: {explanation.distance}")
+    for step in explanation.steps:
+        languages = " ".join(step.languages)
+        print(f"{step.source} -> {step.target} ({step.weight}): {languages}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
+
+
+__all__ = ["Explainer", "Explanation", "Step"]
@@ -9,7 +9,7 @@ from itertools import permutations
 from pathlib import Path
 import typing as t
 
-from simphones.normalize import normalize_ipa
+from simphones.rules import RuleEngine
 
 
 Phone: t.TypeAlias = str
@@ -19,24 +19,19 @@ LanguageCode: t.TypeAlias = str
 InventoryDataset: t.TypeAlias = dict[LanguageCode, Inventory]
 
 
-COMBINING_RING_ABOVE = "\u030a"     # like in å
-COMBINING_RING_BELOW = "\u0325"     # like in ḁ
+# Rules for parsing PHOIBLE segments, unless other rules are given
+default_rules = RuleEngine()
 
 
 def substitute(phone: Phone) -> Phone:
     """Substitute some invalid glyphs inside phone segments."""
-    substitutions = {
-        "tʂ": "ʈʂ",
-        "tʂʼ": "ʈʂʼ",
-        "tʃː": "t̠ʃː",
-        COMBINING_RING_ABOVE: COMBINING_RING_BELOW,
-    }
-    for key, value in substitutions.items():
-        phone = phone.replace(key, value)
-    return phone
-
-
-def get_phonological_inventories() -> InventoryDataset:
+    return default_rules.substitute(phone)
+
+
+def get_phonological_inventories(
+    path: Path | None = None,
+    rules: RuleEngine | None = None,
+) -> InventoryDataset:
     """Get phonological inventories from the PHOIBLE dataset.
 
     The result is a dictionary with Glottocodes as keys.
@@ -45,64 +40,77 @@ def get_phonological_inventories() -> InventoryDataset:
     - "*" (combination of the inventories of every language)
     - "Djindewal" (doesn't have a Glottocode)
     - "ModernAramaic" (doesn't have a Glottocode)
-    """
-    phoible = Path(__file__).with_name("phoible.csv")
 
+    Reads the bundled `phoible.csv` unless another `path` is given.
+    Segments are parsed with the default rules unless other `rules` are
+    given.
+    """
     inventories: InventoryDataset = {}
+    for code, phoneme, allophones in read_segments(path, rules):
+        # Update combined inventory.
+        combined_inventory = inventories.setdefault("*", {})
+        update_inventory(combined_inventory, phoneme, allophones)
+
+        # Update language inventory.
+        language_inventory = inventories.setdefault(code, {})
+        update_inventory(language_inventory, phoneme, allophones)
+    return inventories
+
+
+def read_segments(
+    path: Path | None = None,
+    rules: RuleEngine | None = None,
+) -> t.Iterator[tuple[LanguageCode, Phone, AllophoneSet]]:
+    """Read language code, phoneme and allophones from each row of the PHOIBLE
+    dataset.
+
+    Reads the bundled `phoible.csv` unless another `path` is given, and
+    parses segments with the default rules unless other `rules` are given.
+    """
+    phoible = path or Path(__file__).with_name("phoible.csv")
+    engine = rules or default_rules
+
+    # Segments repeat a lot across languages, so each distinct pair of
+    # phoneme and allophone fields only gets parsed once.
+    cache: dict[tuple[str, str], tuple[Phone, frozenset[Phone]]] = {}
     with open(phoible, encoding="utf-8") as file:
         rows = reader(file)
-        next(rows)  # Drop the header.
+        next(rows, None)    # Drop the header.
 
         for row in rows:
-            glottocode = row[1]
-            raw_phoneme = substitute(row[6])
-            allophones = parse_allophones(row[7])
+            key = (row[6], row[7])
+            if key not in cache:
+                cache[key] = engine.parse_segment(*key)
+            phoneme, allophones = cache[key]
 
-            if "|" in raw_phoneme:
-                # Consider piped segments as allophones.
-                raw_phoneme, *rest = raw_phoneme.split("|")
-                allophones.update(parse_allophones(" ".join(rest)))
-            phoneme = normalize_ipa(raw_phoneme)
-
-            # Update combined inventory.
-            combined_inventory = inventories.setdefault("*", {})
-            update_inventory(combined_inventory, phoneme, allophones)
-
-            # Update language inventory.
             # If the language has no Glottocode, use the language name as a key
             # instead.
-            code = glottocode
+            code = row[1]
             if code == "NA":
                 language_name = row[3]
                 code = language_name.replace(" ", "")
-            language_inventory = inventories.setdefault(code, {})
-            update_inventory(language_inventory, phoneme, allophones)
-    return inventories
+            yield code, phoneme, set(allophones)
+
+
+def parse_segment(
+    phoneme_text: str,
+    allophones_text: str,
+) -> tuple[Phone, frozenset[Phone]]:
+    """Parse phoneme and allophones fields of a PHOIBLE row.
+
+    Piped segments are considered to be allophones.
+    """
+    return default_rules.parse_segment(phoneme_text, allophones_text)
 
 
 def parse_allophones(text: str) -> set[Phone]:
     """Parse space-separated list of allophones.
 
     Returns a set of allophones, or an empty set if the input is "NA".
+    Segments with angled brackets are graphemes, so they're left out, and
+    segments with a vertical line, e.g. [t̪|t], are split.
     """
-    if text in ("", "NA"):
-        return set()
-
-    text = text.replace(COMBINING_RING_ABOVE, COMBINING_RING_BELOW)
-
-    allophones: set[Phone] = set()
-    for allophone in text.split():
-        if (
-            "<" in allophone or ">" in allophone or "⟨" in allophone
-            or "⟩" in allophone
-        ):
-            # Angled brackets contain graphemes, not phonemes.
-            continue
-
-        # Some PHOIBLE segments have a vertical line, e.g. [t̪|t].
-        # We split those into smaller segments.
-        allophones.update(map(normalize_ipa, allophone.split("|")))
-    return set(map(substitute, allophones))
+    return default_rules.parse_allophones(text)
 
 
 def update_inventory(
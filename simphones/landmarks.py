@@ -0,0 +1,193 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Approximate shortest path lengths using landmarks.
+
+Dijkstra's algorithm only runs from a few landmark phones.
+The distance between two phones is then bounded by the triangle inequality:
+for every landmark `l`, `|d(l, a) - d(l, b)| <= d(a, b) <= d(l, a) + d(l, b)`.
+The upper bound is the length of an actual path, so it's used as the
+estimate.
+The nearest neighbors of each phone are then refined with a Dijkstra search
+that stops at the smallest upper bounds.
+"""
+
+from itertools import repeat
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+
+from simphones.inventories import Phone
+
+if t.TYPE_CHECKING:
+    import networkx as nx   # type: ignore
+
+
+Array: t.TypeAlias = npt.NDArray[np.float64]
+Pair: t.TypeAlias = tuple[Phone, Phone]
+
+
+def single_source_distances(
+    graph: "nx.Graph",
+    source: Phone,
+    ids: dict[Phone, int],
+) -> Array:
+    """Return distances from source to every node (`inf` if unreachable)."""
+    # pylint: disable-next=import-outside-toplevel
+    import networkx as nx
+
+    row = np.full(len(ids), np.inf)
+    lengths = nx.single_source_dijkstra_path_length(graph, source)
+    for node, length in lengths.items():
+        row[ids[node]] = length
+    return row
+
+
+def check_parameters(landmarks: int, candidates: int) -> None:
+    """Raise `ValueError` if there are no landmarks, or if the number of
+    candidates is negative.
+    """
+    if landmarks < 1:
+        raise ValueError(f"expected at least one landmark: {landmarks}")
+    if candidates < 0:
+        raise ValueError(f"expected non-negative candidates: {candidates}")
+
+
+def select_landmarks(
+    graph: "nx.Graph",
+    nodes: list[Phone],
+    count: int,
+) -> tuple[list[Phone], Array]:
+    """Select landmarks in a connected graph by farthest-point sampling.
+
+    Each landmark is the node farthest from the previous landmarks.
+    Returns the landmarks, and their distances to every node.
+    Raises `ValueError` if `count` is less than 1.
+    """
+    if count < 1:
+        raise ValueError(f"expected at least one landmark: {count}")
+    ids = {node: index for index, node in enumerate(nodes)}
+    landmarks: list[Phone] = []
+    rows: list[Array] = []
+    closest = np.full(len(nodes), np.inf)
+
+    index = 0
+    while len(landmarks) < min(count, len(nodes)):
+        landmarks.append(nodes[index])
+        rows.append(single_source_distances(graph, nodes[index], ids))
+        closest = np.minimum(closest, rows[-1])
+
+        index = int(np.argmax(closest))
+        if closest[index] == 0:
+            break
+    return landmarks, np.array(rows).reshape(-1, len(nodes))
+
+
+def bounds(distances: Array, index: int) -> tuple[Array, Array]:
+    """Return lower and upper bounds of the distances from a node to every
+    node.
+
+    `distances` are the distances from the landmarks.
+    """
+    source = distances[:, index, None]
+    upper = np.min(source + distances, axis=0)
+    lower = np.max(np.abs(source - distances), axis=0)
+    return lower, upper
+
+
+def landmark_distances(
+    graph: "nx.Graph",
+    landmarks: int = 16,
+    candidates: int = 10,
+) -> dict[Pair, float]:
+    """Approximate length of shortest path between every pair of nodes.
+
+    Same output as `simphones.distances.shortest_path_lengths`, but only
+    the distances between each node and its `candidates` nearest neighbors
+    are guaranteed to be exact.
+    The others may be overestimated.
+    Each connected component gets its own landmarks, so components that
+    aren't larger than `landmarks` are solved exactly.
+    Raises `ValueError` if `landmarks < 1` or `candidates < 0`.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    import networkx as nx
+
+    check_parameters(landmarks, candidates)
+
+    result: dict[Pair, float] = {}
+    for component in nx.connected_components(graph):
+        subgraph = graph.subgraph(component).copy()
+        result.update(component_distances(subgraph, landmarks, candidates))
+    return result
+
+
+def component_distances(
+    graph: "nx.Graph",
+    landmarks: int,
+    candidates: int,
+) -> dict[Pair, float]:
+    """Approximate distances in a connected graph (see
+    `landmark_distances`).
+    """
+    nodes = sorted(graph.nodes)
+    _, distances = select_landmarks(graph, nodes, landmarks)
+
+    result: dict[Pair, float] = {}
+    for i, node in enumerate(nodes):
+        estimates = bounds(distances, i)
+        result.update(zip(
+            zip(repeat(node), nodes[i:]),
+            estimates[1][i:].tolist(),
+        ))
+        result[(node, node)] = 0.0
+
+        # Pairs with smaller IDs were already written, so they get
+        # overwritten.
+        for other, length in refine(graph, node, i, estimates, candidates):
+            pair = (node, other) if node < other else (other, node)
+            result[pair] = length
+    return result
+
+
+def refine(
+    graph: "nx.Graph",
+    source: Phone,
+    index: int,
+    estimates: tuple[Array, Array],
+    candidates: int,
+) -> t.Iterable[tuple[Phone, float]]:
+    """Find exact distances from source to its nearest neighbors.
+
+    `index` is the position of the source, and `estimates` are the lower and
+    upper bounds of the distances from the source.
+    The `candidates` nearest neighbors are at most as far as the
+    `candidates`-th smallest upper bound, so a search truncated there finds
+    them.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    import networkx as nx
+
+    lower, upper = estimates
+    others = np.delete(upper, index)
+    if candidates <= 0 or others.size == 0:
+        return []
+    k = min(candidates, others.size) - 1
+    radius = float(np.partition(others, k)[k])
+
+    # Skip the search if the bounds are already tight for every node that
+    # could be that near.
+    near = lower <= radius
+    near[index] = False
+    if np.array_equal(lower[near], upper[near]):
+        return []
+    lengths = nx.single_source_dijkstra_path_length(
+        graph,
+        source,
+        cutoff=radius,
+    )
+    return t.cast(dict[Phone, float], lengths).items()
+
+
+__all__ = ["check_parameters", "landmark_distances", "select_landmarks"]
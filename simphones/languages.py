@@ -0,0 +1,299 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Similarity between languages based on their phonological inventories.
+
+Each phone in one inventory is matched with the most similar phone in the
+other inventory.
+The similarity of two languages is the average of the mean match scores in
+both directions: `(m(X, Y) + m(Y, X)) / 2`, where `m(X, Y)` is the mean over
+the phones `x` in `X` of the max over the phones `y` in `Y` of `S[x, y]`,
+and `S` is the phone similarity matrix.
+"""
+
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+
+from simphones.distances import compute_distances
+from simphones.inventories import (
+    InventoryDataset,
+    LanguageCode,
+    Phone,
+    get_phonological_inventories,
+)
+from simphones.parallel import pool_map
+from simphones.similarity import SimilarityData, compute_similarity
+
+
+Array: t.TypeAlias = npt.NDArray[np.float32]
+IdArray: t.TypeAlias = npt.NDArray[np.int32]
+
+
+class LanguageSimilarity(t.NamedTuple):
+    """Similarity scores between languages.
+
+    Languages with identical inventories share a row in `scores`:
+    `rows[i]` is the row of `languages[i]`.
+    """
+    languages: list[LanguageCode]
+    rows: IdArray
+    scores: Array
+
+    def score(self, language1: LanguageCode, language2: LanguageCode) -> float:
+        """Return similarity score between two languages."""
+        i = self.rows[self.languages.index(language1)]
+        j = self.rows[self.languages.index(language2)]
+        return float(self.scores[i, j])
+
+
+def similarity_matrix(
+    similarity: SimilarityData,
+    phones: list[Phone],
+) -> Array:
+    """Convert similarity data into a dense matrix indexed by phone ID.
+
+    Every phone has similarity 1 with itself, and missing pairs have
+    similarity 0.
+    """
+    ids = {phone: index for index, phone in enumerate(phones)}
+    pairs = [
+        (ids[a], ids[b], score)
+        for (a, b), score in similarity.items()
+        if a in ids and b in ids
+    ]
+    rows = np.array([i for i, _, _ in pairs], dtype=np.int32)
+    columns = np.array([j for _, j, _ in pairs], dtype=np.int32)
+    scores = np.array([score for _, _, score in pairs], dtype=np.float32)
+
+    matrix = np.zeros((len(phones), len(phones)), dtype=np.float32)
+    matrix[rows, columns] = scores
+    matrix[columns, rows] = scores
+    np.fill_diagonal(matrix, 1)
+    return matrix
+
+
+def deduplicate(
+    inventories: InventoryDataset,
+) -> tuple[list[LanguageCode], IdArray, list[frozenset[Phone]]]:
+    """Group languages with identical inventories.
+
+    Leaves out the combined inventory ("*").
+    Returns the languages, the index of the unique inventory of each
+    language, and the unique inventories.
+    """
+    languages = [code for code in inventories if code != "*"]
+    ids: dict[frozenset[Phone], int] = {}
+    index = [
+        ids.setdefault(frozenset(inventories[code]), len(ids))
+        for code in languages
+    ]
+    return languages, np.array(index, dtype=np.int32), list(ids)
+
+
+def intern_phones(
+    inventories: list[frozenset[Phone]],
+) -> tuple[list[Phone], list[IdArray], Array]:
+    """Replace phones with their IDs in sorted order.
+
+    Returns the phones, the phone IDs in each inventory, and the incidence
+    matrix between inventories and phones.
+    """
+    phones = sorted(
+        {phone for inventory in inventories for phone in inventory}
+    )
+    ids = {phone: position for position, phone in enumerate(phones)}
+    members = [
+        np.array(sorted(ids[phone] for phone in inventory), dtype=np.int32)
+        for inventory in inventories
+    ]
+    incidence = np.zeros((len(inventories), len(phones)), dtype=np.float32)
+    for row, phone_ids in enumerate(members):
+        incidence[row, phone_ids] = 1
+    return phones, members, incidence
+
+
+# Shared state of worker processes
+_worker: dict[str, t.Any] = {}
+
+
+def _init_worker(
+    matrix: Array,
+    incidence: Array,
+    members: list[IdArray],
+) -> None:
+    sizes = np.maximum(incidence.sum(axis=1, keepdims=True), 1)
+    _worker.update(
+        matrix=matrix,
+        incidence=incidence,
+        members=members,
+        sizes=sizes,
+    )
+
+
+def _compute_block(start: int, stop: int) -> Array:
+    """Compute mean match scores of every inventory against a block of
+    inventories.
+    """
+    matrix: Array = _worker["matrix"]
+    members: list[IdArray] = _worker["members"]
+
+    # best[y, p] is the best match for phone p in inventory y.
+    best = np.zeros((stop - start, len(matrix)), dtype=np.float32)
+    for row, phones in enumerate(members[start:stop]):
+        if len(phones):
+            best[row] = matrix[:, phones].max(axis=1)
+    return t.cast(Array, _worker["incidence"] @ best.T / _worker["sizes"])
+
+
+def language_similarity(
+    inventories: InventoryDataset,
+    similarity: SimilarityData,
+    processes: int | None = None,
+    block_size: int = 256,
+) -> LanguageSimilarity:
+    """Compute similarity scores between every pair of languages.
+
+    Identical inventories are only compared once.
+    Blocks of `block_size` inventories run in a process pool (`None` uses
+    every CPU).
+    """
+    languages, index, unique = deduplicate(inventories)
+    phones, members, incidence = intern_phones(unique)
+    means = mean_matches(
+        similarity_matrix(similarity, phones),
+        incidence,
+        members,
+        processes=processes,
+        block_size=block_size,
+    )
+    scores = ((means + means.T) / 2).astype(np.float32, copy=False)
+    return LanguageSimilarity(languages, index, scores)
+
+
+def mean_matches(
+    matrix: Array,
+    incidence: Array,
+    members: list[IdArray],
+    processes: int | None = None,
+    block_size: int = 256,
+) -> Array:
+    """Compute mean match scores `m(X, Y)` of every pair of inventories.
+
+    See `intern_phones` for `incidence` and `members`.
+    """
+    starts = list(range(0, len(members), block_size))
+    stops = [min(start + block_size, len(members)) for start in starts]
+    blocks = pool_map(
+        _compute_block,
+        starts,
+        stops,
+        initializer=_init_worker,
+        initargs=(matrix, incidence, members),
+        processes=processes,
+        finalizer=_worker.clear,
+    )
+
+    means = np.empty((len(members), len(members)), dtype=np.float32)
+    for block, start, stop in zip(blocks, starts, stops):
+        means[:, start:stop] = block
+    return means
+
+
+def save_language_similarity(
+    path: Path,
+    result: LanguageSimilarity,
+    block_size: int = 256,
+) -> None:
+    """Save full language similarity matrix as a `.npy` file.
+
+    The matrix can be memory-mapped with `load_language_similarity`.
+    The languages are saved in the same order, one per line, in a text file
+    with the same name and a `.txt` suffix.
+    """
+    count = len(result.languages)
+    matrix = np.lib.format.open_memmap(
+        path,
+        mode="w+",
+        dtype=np.float32,
+        shape=(count, count),
+    )
+    for start in range(0, count, block_size):
+        rows = result.scores[result.rows[start:start + block_size]]
+        matrix[start:start + block_size] = rows[:, result.rows]
+    matrix.flush()
+    del matrix
+
+    text = "".join(f"{code}\n" for code in result.languages)
+    path.with_suffix(".txt").write_text(text, encoding="utf-8")
+
+
+def load_language_similarity(
+    path: Path,
+) -> tuple[list[LanguageCode], Array]:
+    """Load languages and memory-mapped matrix saved by
+    `save_language_similarity`.
+    """
+    text = path.with_suffix(".txt").read_text(encoding="utf-8")
+    return text.splitlines(), np.load(path, mmap_mode="r")
+
+
+def parse_args() -> Namespace:
+    """Parse command-line arguments."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-d",
+        "--data",
+        dest="data",
+        default=None,
+        type=Path,
+        help="simphones output file (default: compute scores from PHOIBLE)",
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        dest="processes",
+        default=None,
+        type=int,
+        help="number of worker processes (default: every CPU)",
+    )
+    parser.add_argument(
+        "output",
+        type=Path,
+        help="output .npy file (languages are saved in a .txt file)",
+    )
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    """Script entrypoint."""
+    inventories = get_phonological_inventories()
+    if args.data is not None:
+        # pylint: disable-next=import-outside-toplevel
+        from simphones.query import read_data
+
+        similarity = read_data(args.data)
+    else:
+        similarity = compute_similarity(compute_distances(inventories))
+
+    result = language_similarity(
+        inventories,
+        similarity,
+        processes=args.processes,
+    )
+    save_language_similarity(args.output, result)
+
+
+if __name__ == "__main__":
+    main(parse_args())
+
+
+__all__ = [
+    "LanguageSimilarity",
+    "language_similarity",
+    "load_language_similarity",
+    "save_language_similarity",
+]
@@ -0,0 +1,45 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Run tasks in a process pool."""
+
+from concurrent.futures import ProcessPoolExecutor
+import typing as t
+
+
+T = t.TypeVar("T")
+
+
+def pool_map(
+    function: t.Callable[..., T],
+    *iterables: t.Iterable[t.Any],
+    initializer: t.Callable[..., None],
+    initargs: tuple[t.Any, ...] = (),
+    processes: int | None = None,
+    finalizer: t.Callable[[], None] | None = None,
+) -> t.Iterator[T]:
+    """Like `map`, but in a process pool (`None` uses every CPU).
+
+    `initializer` sets up the state shared by the tasks of each worker,
+    so that large inputs only get sent to each worker once.
+    If `processes` is 1, the tasks run in the current process instead, and
+    `finalizer` gets called afterwards to release the shared state.
+    """
+    if processes == 1:
+        initializer(*initargs)
+        try:
+            yield from map(function, *iterables)
+        finally:
+            if finalizer is not None:
+                finalizer()
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=initializer,
+        initargs=initargs,
+    ) as executor:
+        yield from executor.map(function, *iterables)
+
+
+__all__ = ["pool_map"]
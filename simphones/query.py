@@ -0,0 +1,234 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Look up similarity scores in an existing simphones output file.
+
+This module shouldn't import anything that isn't needed to read the output
+files, so that lookups start up fast.
+"""
+
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+import typing as t
+
+from simphones.distances import unordered
+from simphones.inventories import Phone
+from simphones.normalize import normalize_ipa
+from simphones.similarity import SimilarityData
+from simphones.utils import read_from_csv, read_from_json, read_from_sqlite
+
+
+# File extensions of SQLite output files
+SQLITE_SUFFIXES = (".db", ".sqlite")
+
+
+class Index(t.Protocol):
+    """Interface of similarity lookup tables."""
+
+    def similarity(self, phone1: Phone, phone2: Phone) -> float:
+        """Return similarity score between two phones."""
+
+    def most_similar(
+        self,
+        phone: Phone,
+        k: int | None = 10,
+    ) -> list[tuple[Phone, float]]:
+        """Return the `k` phones most similar to `phone`."""
+
+
+class SimilarityIndex:
+    """Similarity lookup table.
+
+    Follows the interpretation of the data described in the README:
+    scores are symmetric, every phone has similarity 1 with itself, and pairs
+    that are missing from the data have similarity 0.
+    """
+
+    def __init__(self, data: SimilarityData) -> None:
+        self.data = data
+        self._neighbors: dict[Phone, list[tuple[Phone, float]]] | None = None
+
+    def similarity(self, phone1: Phone, phone2: Phone) -> float:
+        """Return similarity score between two phones."""
+        phone1 = normalize_ipa(phone1)
+        phone2 = normalize_ipa(phone2)
+        if phone1 == phone2:
+            return 1.0
+        return self.data.get(unordered(phone1, phone2), 0.0)
+
+    def most_similar(
+        self,
+        phone: Phone,
+        k: int | None = 10,
+    ) -> list[tuple[Phone, float]]:
+        """Return the `k` phones most similar to `phone`, along with their
+        scores, from most to least similar.
+
+        Set `k` to `None` to return every phone with a non-zero score.
+        """
+        neighbors = self.neighbors().get(normalize_ipa(phone), [])
+        return neighbors[:k]
+
+    def neighbors(self) -> dict[Phone, list[tuple[Phone, float]]]:
+        """Return sorted neighbor lists of every phone.
+
+        The lists are built on first use.
+        """
+        if self._neighbors is None:
+            neighbors: dict[Phone, list[tuple[Phone, float]]] = {}
+            for (phone1, phone2), score in self.data.items():
+                if phone1 == phone2:
+                    continue
+                neighbors.setdefault(phone1, []).append((phone2, score))
+                neighbors.setdefault(phone2, []).append((phone1, score))
+
+            for values in neighbors.values():
+                values.sort(key=lambda item: (-item[1], item[0]))
+            self._neighbors = neighbors
+        return self._neighbors
+
+
+class SqliteIndex:
+    """Similarity lookup table backed by an SQLite output file.
+
+    Same semantics as `SimilarityIndex`, but lookups are indexed queries, so
+    the data doesn't have to be loaded into memory.
+    """
+
+    def __init__(self, path: Path) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        import sqlite3
+
+        self.connection = sqlite3.connect(
+            f"{path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
+        self.ids: dict[Phone, int] = {
+            phone: id_
+            for id_, phone in self.connection.execute("SELECT * FROM phones")
+        }
+
+    def similarity(self, phone1: Phone, phone2: Phone) -> float:
+        """Return similarity score between two phones."""
+        phone1 = normalize_ipa(phone1)
+        phone2 = normalize_ipa(phone2)
+        if phone1 == phone2:
+            return 1.0
+
+        ids = (self.ids.get(phone1), self.ids.get(phone2))
+        row = self.connection.execute(
+            "SELECT score FROM pairs WHERE phone1 = ? AND phone2 = ?",
+            ids,
+        ).fetchone()
+        return 0.0 if row is None else float(row[0])
+
+    def most_similar(
+        self,
+        phone: Phone,
+        k: int | None = 10,
+    ) -> list[tuple[Phone, float]]:
+        """Return the `k` phones most similar to `phone`, along with their
+        scores, from most to least similar.
+
+        Set `k` to `None` to return every phone in the data.
+        """
+        return self.above(phone, None, k)
+
+    def above(
+        self,
+        phone: Phone,
+        threshold: float | None,
+        k: int | None = None,
+    ) -> list[tuple[Phone, float]]:
+        """Return phones with similarity greater than `threshold` to `phone`,
+        from most to least similar.
+        """
+        rows = self.connection.execute(
+            """
+            SELECT phones.phone, score
+            FROM pairs JOIN phones ON phones.id = phone2
+            WHERE phone1 = ? AND score > ?
+            ORDER BY score DESC, phone2
+            LIMIT ?
+            """,
+            (
+                self.ids.get(normalize_ipa(phone)),
+                -1.0 if threshold is None else threshold,
+                -1 if k is None else k,
+            ),
+        )
+        return [(neighbor, float(score)) for neighbor, score in rows]
+
+    def close(self) -> None:
+        """Close database connection."""
+        self.connection.close()
+
+
+def read_data(path: Path) -> SimilarityData:
+    """Read similarity data from any supported output format.
+
+    The format is guessed from the file extension, and directories are read
+    as shards.
+    May raise `MalformedDataset`.
+    """
+    if path.suffix == ".json":
+        return read_from_json(path)
+    if path.suffix in SQLITE_SUFFIXES:
+        return read_from_sqlite(path)
+    return read_from_csv(path)
+
+
+def load_index(path: Path) -> Index:
+    """Load similarity lookup table from output file.
+
+    SQLite files are queried in place instead of being loaded into memory.
+    """
+    if path.suffix in SQLITE_SUFFIXES:
+        return SqliteIndex(path)
+    return SimilarityIndex(read_data(path))
+
+
+def add_arguments(parser: ArgumentParser) -> None:
+    """Add arguments of the `query` subcommand."""
+    parser.add_argument(
+        "-k",
+        dest="k",
+        default=10,
+        type=int,
+        help="number of neighbors to show (default: 10)",
+    )
+    parser.add_argument(
+        "data",
+        type=Path,
+        help="simphones output file",
+    )
+    parser.add_argument(
+        "phones",
+        nargs="+",
+        help=(
+            "a pair of phones to compare, or a single phone to find the most"
+            " similar phones to"
+        ),
+    )
+
+
+def main(args: Namespace) -> None:
+    """Entrypoint of the `query` subcommand."""
+    index = load_index(args.data)
+    if len(args.phones) == 1:
+        for phone, score in index.most_similar(args.phones[0], args.k):
+            print(f"{phone},{score}")
+    elif len(args.phones) == 2:
+        print(index.similarity(*args.phones))
+    else:
+        raise SystemExit("expected one or two phones")
+
+
+__all__ = [
+    "Index",
+    "SimilarityIndex",
+    "SqliteIndex",
+    "load_index",
+    "read_data",
+]
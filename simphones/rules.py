@@ -0,0 +1,207 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Compiled rules for cleaning up PHOIBLE segments.
+
+Each set of substitutions is compiled into a single regular expression, so
+that a segment only gets scanned once per stage, and the normalized form of
+every distinct segment is memoized.
+
+The default rules give the same output as the original pipeline:
+
+- phonemes: substitute, split on the separator, normalize
+- allophones: fix, drop graphemes, split on the separator, normalize,
+  substitute
+
+Rule files are JSON objects with any of the following keys (missing keys
+keep their default values):
+
+- "substitutions": replacements for invalid glyphs
+- "fixes": replacements applied to allophones before normalization
+- "graphemes": characters that mark graphemes instead of phones
+- "separator": separator of segments that should be split
+- "modifiers": sort order of IPA modifiers
+"""
+
+from json import JSONDecodeError, loads
+from pathlib import Path
+import re
+from types import MappingProxyType
+import typing as t
+from unicodedata import normalize
+
+from simphones.normalize import modifiers
+
+
+COMBINING_RING_ABOVE = "\u030a"     # like in å
+COMBINING_RING_BELOW = "\u0325"     # like in ḁ
+
+
+class MalformedRules(ValueError):
+    """Raised when reading an invalid rule file."""
+
+
+class Rules(t.NamedTuple):
+    """Configuration of `RuleEngine`."""
+    substitutions: t.Mapping[str, str] = MappingProxyType({
+        "tʂ": "ʈʂ",
+        "tʂʼ": "ʈʂʼ",
+        "tʃː": "t̠ʃː",
+        COMBINING_RING_ABOVE: COMBINING_RING_BELOW,
+    })
+    fixes: t.Mapping[str, str] = MappingProxyType({
+        COMBINING_RING_ABOVE: COMBINING_RING_BELOW,
+    })
+    graphemes: str = "<>⟨⟩"
+    separator: str = "|"
+    modifiers: t.Mapping[str, int] = MappingProxyType(modifiers)
+
+
+def read_rules(path: Path) -> Rules:
+    """Read rules from JSON file.
+
+    May raise `MalformedRules`.
+    """
+    try:
+        data = loads(path.read_text(encoding="utf-8"))
+    except (OSError, JSONDecodeError) as exc:
+        raise MalformedRules(str(exc)) from exc
+    if not isinstance(data, dict):
+        raise MalformedRules("expected a JSON object")
+
+    for key, value in data.items():
+        if key not in Rules.__annotations__:
+            raise MalformedRules(f"unknown rule: {key}")
+        if not is_valid_rule(key, value):
+            raise MalformedRules(f"invalid value for rule: {key}")
+    return Rules(**data)
+
+
+def is_valid_rule(key: str, value: t.Any) -> bool:
+    """Check type of rule in rule file."""
+    if key in ("substitutions", "fixes"):
+        return isinstance(value, dict) and all(
+            isinstance(item, str) for pair in value.items() for item in pair
+        )
+    if key == "modifiers":
+        return isinstance(value, dict) and all(
+            isinstance(modifier, str) and len(modifier) == 1
+            and isinstance(order, int)
+            for modifier, order in value.items()
+        )
+    if key == "separator":
+        return isinstance(value, str) and value != ""
+    return isinstance(value, str)
+
+
+def compile_substitutions(
+    substitutions: t.Mapping[str, str],
+) -> t.Callable[[str], str]:
+    """Compile substitutions into a function that applies them in one pass.
+
+    At each position, the longest matching key gets replaced.
+    """
+    keys = [key for key in substitutions if key]
+    if not keys:
+        return lambda text: text
+
+    keys.sort(key=len, reverse=True)
+    pattern = re.compile("|".join(map(re.escape, keys)))
+
+    def replace(match: re.Match[str]) -> str:
+        return substitutions[match.group()]
+
+    return lambda text: pattern.sub(replace, text)
+
+
+class RuleEngine:
+    """Parse PHOIBLE segments with precompiled rules."""
+
+    def __init__(self, rules: Rules = Rules()) -> None:
+        self.rules = rules
+        self.substitute = compile_substitutions(rules.substitutions)
+        self.fix = compile_substitutions(rules.fixes)
+
+        order = rules.modifiers
+        characters = "".join(map(re.escape, order))
+        self.modifier_runs = (
+            re.compile(f"[{characters}]{{2,}}") if order else None
+        )
+        self.grapheme = (
+            re.compile(f"[{re.escape(rules.graphemes)}]")
+            if rules.graphemes else None
+        )
+
+        # Normalized and substituted allophones
+        self.allophones: dict[str, str] = {}
+
+    @classmethod
+    def from_file(cls, path: Path) -> "RuleEngine":
+        """Create rule engine from rule file.
+
+        May raise `MalformedRules`.
+        """
+        return cls(read_rules(path))
+
+    def normalize(self, text: str) -> str:
+        """Normalize IPA transcription (like `normalize_ipa`)."""
+        text = normalize("NFD", text)
+        if self.modifier_runs is None:
+            return text
+
+        return self.modifier_runs.sub(self.sort_modifiers, text)
+
+    def sort_modifiers(self, match: re.Match[str]) -> str:
+        """Sort run of modifiers."""
+        return "".join(
+            sorted(match.group(), key=self.rules.modifiers.__getitem__)
+        )
+
+    def parse_allophone(self, text: str) -> str:
+        """Normalize a single allophone."""
+        result = self.allophones.get(text)
+        if result is None:
+            result = self.substitute(self.normalize(text))
+            self.allophones[text] = result
+        return result
+
+    def parse_allophones(self, text: str) -> set[str]:
+        """Parse space-separated list of allophones.
+
+        Returns an empty set if the input is "NA".
+        """
+        if text in ("", "NA"):
+            return set()
+
+        allophones: set[str] = set()
+        for allophone in self.fix(text).split():
+            if self.grapheme is not None and self.grapheme.search(allophone):
+                continue
+            allophones.update(
+                map(
+                    self.parse_allophone,
+                    allophone.split(self.rules.separator),
+                )
+            )
+        return allophones
+
+    def parse_segment(
+        self,
+        phoneme_text: str,
+        allophones_text: str,
+    ) -> tuple[str, frozenset[str]]:
+        """Parse phoneme and allophones fields of a PHOIBLE row.
+
+        Piped phoneme segments are split, and the rest of the segment is
+        considered to be allophones.
+        """
+        phoneme, *rest = self.substitute(phoneme_text).split(
+            self.rules.separator
+        )
+        allophones = self.parse_allophones(allophones_text)
+        if rest:
+            allophones.update(self.parse_allophones(" ".join(rest)))
+        return self.normalize(phoneme), frozenset(allophones)
+
+
+__all__ = ["MalformedRules", "RuleEngine", "Rules", "read_rules"]
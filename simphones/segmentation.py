@@ -0,0 +1,138 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Split IPA transcriptions into phones from a known inventory."""
+
+from pathlib import Path
+import typing as t
+
+from simphones.inventories import InventoryDataset, Phone
+from simphones.normalize import modifiers, normalize_ipa
+from simphones.query import read_data
+
+
+class UnknownSegment(ValueError):
+    """Raised in strict mode when part of a transcription doesn't start with
+    any known phone.
+    """
+
+
+class Tokenizer:
+    """Greedy longest-match tokenizer.
+
+    The phones are compiled into a trie, which is stored as a list of
+    transition tables, so that each input symbol only costs a dictionary
+    lookup.
+    Transcriptions are normalized with `normalize_ipa`, and whitespace
+    separates words.
+    Since words repeat a lot in real transcriptions, the normalized
+    segmentation of each word is cached (up to `cache_size` words).
+
+    If a word doesn't start with a known phone, the next symbol and the
+    modifiers after it become a token by themselves, and a run of modifiers
+    that doesn't start a known phone gets attached to the previous token.
+    If `strict` is set, `UnknownSegment` is raised instead.
+    """
+
+    def __init__(
+        self,
+        phones: t.Iterable[Phone],
+        strict: bool = False,
+        cache_size: int = 100_000,
+    ) -> None:
+        self.strict = strict
+        self.cache_size = cache_size
+        self.cache: dict[str, tuple[Phone, ...]] = {}
+
+        self.transitions: list[dict[str, int]] = [{}]
+        self.accepting: list[bool] = [False]
+        for phone in phones:
+            self.add(normalize_ipa(phone))
+
+    def add(self, phone: Phone) -> None:
+        """Add phone to the trie."""
+        if not phone:
+            return
+
+        state = 0
+        for symbol in phone:
+            table = self.transitions[state]
+            if symbol not in table:
+                table[symbol] = len(self.transitions)
+                self.transitions.append({})
+                self.accepting.append(False)
+            state = table[symbol]
+        self.accepting[state] = True
+        self.cache.clear()
+
+    @classmethod
+    def from_inventories(cls, inventories: InventoryDataset) -> "Tokenizer":
+        """Create tokenizer for the combined inventory ("*") of
+        `get_phonological_inventories`.
+        """
+        return cls(inventories["*"].keys())
+
+    @classmethod
+    def from_file(cls, path: Path) -> "Tokenizer":
+        """Create tokenizer for the phones in a simphones output file."""
+        data = read_data(path)
+        return cls({phone for pair in data for phone in pair})
+
+    def segment(self, word: str) -> tuple[Phone, ...]:
+        """Split normalized word (no whitespace) into phones."""
+        transitions = self.transitions
+        accepting = self.accepting
+
+        tokens: list[Phone] = []
+        start = 0
+        length = len(word)
+        while start < length:
+            state = 0
+            end = -1
+            index = start
+            while index < length:
+                state = transitions[state].get(word[index], -1)
+                if state < 0:
+                    break
+                index += 1
+                if accepting[state]:
+                    end = index
+
+            if end < 0:
+                if self.strict:
+                    raise UnknownSegment(word[start:])
+
+                # Modifiers aren't phones by themselves.
+                end = start + 1
+                while end < length and word[end] in modifiers:
+                    end += 1
+                if tokens and word[start] in modifiers:
+                    tokens[-1] += word[start:end]
+                    start = end
+                    continue
+            tokens.append(word[start:end])
+            start = end
+        return tuple(tokens)
+
+    def tokenize(self, transcription: str) -> list[Phone]:
+        """Split transcription into phones."""
+        cache = self.cache
+        tokens: list[Phone] = []
+        for word in transcription.split():
+            segments = cache.get(word)
+            if segments is None:
+                segments = self.segment(normalize_ipa(word))
+                if len(cache) < self.cache_size:
+                    cache[word] = segments
+            tokens.extend(segments)
+        return tokens
+
+    def tokenize_many(
+        self,
+        transcriptions: t.Iterable[str],
+    ) -> list[list[Phone]]:
+        """Split every transcription into phones."""
+        return [self.tokenize(text) for text in transcriptions]
+
+
+__all__ = ["Tokenizer", "UnknownSegment"]
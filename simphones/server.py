@@ -0,0 +1,370 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Serve similarity lookups from a single in-memory copy of the data.
+
+The server speaks newline-delimited JSON over a Unix socket or a localhost
+TCP port.
+Each request is a JSON object with an "op" key, and each request gets exactly
+one JSON object as a response.
+
+- `{"op": "similarity", "pairs": [[a, b], ...]}`
+- `{"op": "most_similar", "phones": [a, ...], "k": 10}`
+- `{"op": "submatrix", "language": glottocode}` or
+  `{"op": "submatrix", "phones": [a, ...]}`
+- `{"op": "stats"}`
+
+Failed requests get a response with an "error" key.
+"""
+
+from argparse import ArgumentParser, Namespace
+import asyncio
+from collections import deque
+from json import dumps, loads
+from pathlib import Path
+import socket
+from time import perf_counter
+import typing as t
+
+from simphones.inventories import (
+    InventoryDataset,
+    LanguageCode,
+    Phone,
+    get_phonological_inventories,
+)
+from simphones.query import Index, load_index
+
+
+Request: t.TypeAlias = dict[str, t.Any]
+Response: t.TypeAlias = dict[str, t.Any]
+
+
+class ServerError(Exception):
+    """Raised by the client when the server rejects a request."""
+
+
+class LatencyStats:
+    """Keep track of request latencies and throughput.
+
+    Only the latest `window` latencies are kept, so memory use is bounded.
+    """
+
+    def __init__(self, window: int = 100_000) -> None:
+        self.start = perf_counter()
+        self.requests = 0
+        self.items = 0
+        self.latencies: deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float, items: int) -> None:
+        """Record a request that took `latency` seconds and looked up
+        `items` entries.
+        """
+        self.requests += 1
+        self.items += items
+        self.latencies.append(latency)
+
+    def percentile(self, q: float) -> float:
+        """Return latency percentile (nearest rank), or 0 if there are no
+        requests yet.
+        """
+        if not self.latencies:
+            return 0.0
+        values = sorted(self.latencies)
+        rank = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+        return values[rank]
+
+    def summary(self) -> dict[str, float]:
+        """Summarize stats."""
+        elapsed = perf_counter() - self.start
+        return {
+            "requests": self.requests,
+            "items": self.items,
+            "uptime": elapsed,
+            "requests_per_second": self.requests / elapsed,
+            "items_per_second": self.items / elapsed,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class SimilarityServer:
+    """Answer batched lookup requests.
+
+    `inventories` loads the inventories used by "submatrix" requests.
+    By default, they come from the PHOIBLE dataset.
+    The inventories are loaded once (see `load_inventories`).
+    """
+
+    def __init__(
+        self,
+        index: Index,
+        inventories: t.Callable[[], InventoryDataset] = (
+            get_phonological_inventories
+        ),
+    ) -> None:
+        self.index = index
+        self.inventories = inventories
+        self.dataset: InventoryDataset | None = None
+        self.failure: Exception | None = None
+        self.sounds: dict[LanguageCode, list[Phone]] = {}
+        self.stats = LatencyStats()
+
+    def dispatch(self, request: Request) -> tuple[Response, int]:
+        """Answer request.
+
+        Returns the response and the number of items looked up.
+        Raises `KeyError`, `TypeError` or `ValueError` on invalid requests,
+        and whatever the inventory loader raises.
+        """
+        op = request["op"]
+        if op == "similarity":
+            pairs = request["pairs"]
+            results = [self.index.similarity(a, b) for a, b in pairs]
+            return {"results": results}, len(results)
+
+        if op == "most_similar":
+            k = request.get("k", 10)
+            neighbors = [
+                self.index.most_similar(phone, k)
+                for phone in request["phones"]
+            ]
+            return {"results": neighbors}, len(neighbors)
+
+        if op == "submatrix":
+            phones = request.get("phones")
+            if phones is None:
+                phones = self.language_sounds(request["language"])
+            matrix = [
+                [self.index.similarity(a, b) for b in phones]
+                for a in phones
+            ]
+            return {"phones": phones, "matrix": matrix}, len(phones) ** 2
+
+        if op == "stats":
+            return self.stats.summary(), 0
+        raise ValueError(f"unknown op: {op}")
+
+    def language_sounds(self, language: LanguageCode) -> list[Phone]:
+        """Return sorted sounds of the language.
+
+        Unknown languages have no sounds.
+        """
+        if language not in self.sounds:
+            dataset = self.load_inventories()
+            self.sounds[language] = sorted(dataset.get(language, {}))
+        return self.sounds[language]
+
+    def load_inventories(self) -> InventoryDataset:
+        """Load inventories if they haven't been loaded yet.
+
+        If the loader fails, the same exception gets raised on every later
+        call, instead of running the loader again.
+        """
+        if self.failure is not None:
+            raise self.failure
+        if self.dataset is None:
+            try:
+                self.dataset = self.inventories()
+            except Exception as exc:
+                self.failure = exc
+                raise
+        return self.dataset
+
+    def answer(self, line: bytes) -> bytes:
+        """Answer a single line of the protocol."""
+        start = perf_counter()
+        try:
+            request = loads(line)
+            response, items = self.dispatch(request)
+        # A failed request shouldn't close the connection.
+        except Exception as exc:    # pylint: disable=broad-exception-caught
+            response, items = {"error": f"{type(exc).__name__}: {exc}"}, 0
+        self.stats.record(perf_counter() - start, items)
+        return dumps(response, ensure_ascii=False).encode() + b"\n"
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Handle client connection."""
+        try:
+            while line := await reader.readline():
+                writer.write(self.answer(line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def start_server(
+    server: SimilarityServer,
+    path: Path | None = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> asyncio.Server:
+    """Listen on Unix socket if `path` is given, or on a TCP port otherwise.
+
+    Use port 0 to pick any free port.
+    """
+    limit = 2 ** 24    # Allow large batches.
+    if path is not None:
+        return await asyncio.start_unix_server(
+            server.handle,
+            path=path,
+            limit=limit,
+        )
+    return await asyncio.start_server(
+        server.handle,
+        host=host,
+        port=port,
+        limit=limit,
+    )
+
+
+class Client:
+    """Blocking client for `SimilarityServer`."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        host: str = "127.0.0.1",
+        port: int | None = None,
+    ) -> None:
+        if path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(str(path))
+        elif port is not None:
+            self.socket = socket.create_connection((host, port))
+        else:
+            raise ValueError("missing socket path or port")
+        self.file = self.socket.makefile("rwb")
+
+    def request(self, request: Request) -> Response:
+        """Send request and wait for the response.
+
+        May raise `ServerError` or `ConnectionError`.
+        """
+        self.file.write(dumps(request, ensure_ascii=False).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        response: Response = loads(line)
+        if "error" in response:
+            raise ServerError(response["error"])
+        return response
+
+    def similarity(
+        self,
+        pairs: t.Iterable[tuple[Phone, Phone]],
+    ) -> list[float]:
+        """Look up similarity scores of phone pairs."""
+        response = self.request({"op": "similarity", "pairs": list(pairs)})
+        return t.cast(list[float], response["results"])
+
+    def most_similar(
+        self,
+        phones: t.Iterable[Phone],
+        k: int | None = 10,
+    ) -> list[list[tuple[Phone, float]]]:
+        """Look up the most similar phones of each phone."""
+        request = {"op": "most_similar", "phones": list(phones), "k": k}
+        results = self.request(request)["results"]
+        return [
+            [(phone, float(score)) for phone, score in neighbors]
+            for neighbors in results
+        ]
+
+    def submatrix(
+        self,
+        language: LanguageCode | None = None,
+        phones: t.Iterable[Phone] | None = None,
+    ) -> tuple[list[Phone], list[list[float]]]:
+        """Look up similarity matrix of the sounds in a language, or of the
+        given phones.
+        """
+        request: Request = {"op": "submatrix"}
+        if phones is not None:
+            request["phones"] = list(phones)
+        else:
+            request["language"] = language
+        response = self.request(request)
+        return response["phones"], response["matrix"]
+
+    def stats(self) -> dict[str, float]:
+        """Return server throughput and latency percentiles."""
+        return self.request({"op": "stats"})
+
+    def close(self) -> None:
+        """Close connection."""
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+def add_arguments(parser: ArgumentParser) -> None:
+    """Add arguments of the `serve` subcommand."""
+    parser.add_argument(
+        "-s",
+        "--socket",
+        dest="socket",
+        default=None,
+        type=Path,
+        help="listen on Unix socket instead of TCP port",
+    )
+    parser.add_argument(
+        "-p",
+        "--port",
+        dest="port",
+        default=8000,
+        type=int,
+        help="localhost TCP port (default: 8000)",
+    )
+    parser.add_argument(
+        "data",
+        type=Path,
+        help="simphones output file",
+    )
+
+
+async def run(args: Namespace) -> None:
+    """Load data and serve forever.
+
+    The inventories for "submatrix" requests are loaded in a thread before
+    serving, so that parsing PHOIBLE doesn't block the event loop.
+    """
+    server = SimilarityServer(load_index(args.data))
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            server.load_inventories,
+        )
+    except Exception as exc:    # pylint: disable=broad-exception-caught
+        print(f"Submatrix requests by language will fail: {exc}")
+    listener = await start_server(server, path=args.socket, port=args.port)
+    address = args.socket or f"127.0.0.1:{args.port}"
+    print(f"Serving {args.data} on {address}.")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        print(dumps(server.stats.summary(), indent=2))
+
+
+def main(args: Namespace) -> None:
+    """Entrypoint of the `serve` subcommand."""
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+__all__ = ["Client", "ServerError", "SimilarityServer", "start_server"]
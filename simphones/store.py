@@ -0,0 +1,256 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Columnar, dictionary-encoded store of preprocessed PHOIBLE data.
+
+The store is a directory of NumPy arrays that can be memory-mapped:
+
+- `languages.npy`: language codes, in order of first appearance
+- `segments.npy`: normalized phones, sorted, so that comparing segment IDs
+  is the same as comparing phones
+- `members.npy`: (language ID, segment ID) rows, one for each phone in each
+  inventory
+- `edges.npy`: (language ID, segment ID, segment ID) rows, one for each pair
+  of allophones in each inventory, with the smaller segment ID first
+
+The combined inventory ("*") isn't stored, because it's the union of the
+other inventories.
+"""
+
+from argparse import ArgumentParser, Namespace
+from collections import Counter
+from itertools import combinations
+from pathlib import Path
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+
+from simphones.distances import Cooccurrence, allophone_graph
+from simphones.inventories import InventoryDataset, read_segments
+
+if t.TYPE_CHECKING:
+    import networkx as nx   # type: ignore
+
+
+IdArray: t.TypeAlias = npt.NDArray[np.int32]
+CodeArray: t.TypeAlias = npt.NDArray[np.int64]
+
+
+class Store(t.NamedTuple):
+    """Preprocessed PHOIBLE data."""
+    languages: npt.NDArray[np.str_]
+    segments: npt.NDArray[np.str_]
+    members: IdArray
+    edges: IdArray
+
+
+# Names of the arrays in `Store`
+FIELDS = ("languages", "segments", "members", "edges")
+
+
+def import_phoible(directory: Path, path: Path | None = None) -> Store:
+    """Convert PHOIBLE CSV file into a store.
+
+    Reads the bundled `phoible.csv` unless another `path` is given.
+    """
+    languages: dict[str, int] = {}
+    members: set[tuple[int, str]] = set()
+    edges: set[tuple[int, str, str]] = set()
+    for code, phoneme, allophones in read_segments(path):
+        language = languages.setdefault(code, len(languages))
+        phones = sorted({phoneme, *allophones})
+        members.update((language, phone) for phone in phones)
+        edges.update((language, a, b) for a, b in combinations(phones, 2))
+
+    segments = sorted({phone for _, phone in members})
+    ids = {phone: index for index, phone in enumerate(segments)}
+    store = Store(
+        languages=np.array(list(languages), dtype=np.str_),
+        segments=np.array(segments, dtype=np.str_),
+        members=as_ids(sorted(
+            (language, ids[phone]) for language, phone in members
+        ), 2),
+        edges=as_ids(sorted(
+            (language, ids[a], ids[b]) for language, a, b in edges
+        ), 3),
+    )
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, array in zip(FIELDS, store):
+        np.save(directory/f"{name}.npy", array)
+    return store
+
+
+def as_ids(rows: list[tuple[int, ...]], width: int) -> IdArray:
+    """Convert rows of IDs into an array."""
+    return np.array(rows, dtype=np.int32).reshape(-1, width)
+
+
+def load_store(directory: Path, mmap: bool = True) -> Store:
+    """Load store, memory-mapped by default."""
+    mode: t.Literal["r"] | None = "r" if mmap else None
+    arrays = {
+        name: np.load(directory/f"{name}.npy", mmap_mode=mode)
+        for name in FIELDS
+    }
+    return Store(**arrays)
+
+
+def load_inventories(store: Store) -> InventoryDataset:
+    """Convert store into the same dataset as `get_phonological_inventories`.
+    """
+    segments = store.segments.tolist()
+    languages = store.languages.tolist()
+    if not languages:
+        return {}
+
+    inventories: InventoryDataset = {"*": {}}
+    combined = inventories["*"]
+    for code in languages:
+        inventories[code] = {}
+
+    for language, segment in store.members.tolist():
+        phone = segments[segment]
+        inventories[languages[language]][phone] = {phone}
+        combined.setdefault(phone, {phone})
+
+    for language, a, b in store.edges.tolist():
+        phone1 = segments[a]
+        phone2 = segments[b]
+        inventory = inventories[languages[language]]
+        for target in (inventory, combined):
+            target[phone1].add(phone2)
+            target[phone2].add(phone1)
+    return inventories
+
+
+def encode_pairs(a: IdArray, b: IdArray, size: int) -> CodeArray:
+    """Encode pairs of segment IDs as single integers."""
+    return a.astype(np.int64) * size + b
+
+
+def count_codes(store: Store, codes: CodeArray) -> Counter[Cooccurrence]:
+    """Count encoded segment pairs, and decode them into phone pairs."""
+    size = len(store.segments)
+    unique, counts = np.unique(codes, return_counts=True)
+    segments = store.segments.tolist()
+    return Counter({
+        (segments[code // size], segments[code % size]): count
+        for code, count in zip(unique.tolist(), counts.tolist())
+    })
+
+
+def allophone_codes(store: Store) -> CodeArray:
+    """Return encoded allophone pairs, one for each inventory they appear in.
+
+    Like in `simphones.distances.count_allophones`, each phone is an
+    allophone of itself, and the combined inventory ("*") counts as an
+    inventory.
+    """
+    size = len(store.segments)
+    phones = store.members[:, 1]
+    combined_phones = np.unique(phones)
+    edges = encode_pairs(store.edges[:, 1], store.edges[:, 2], size)
+    return np.concatenate([
+        encode_pairs(phones, phones, size),
+        encode_pairs(combined_phones, combined_phones, size),
+        edges,
+        np.unique(edges),
+    ])
+
+
+def cooccurrence_codes(
+    store: Store,
+    only: CodeArray | None = None,
+) -> CodeArray:
+    """Return encoded pairs of phones that occur in the same inventory, one
+    for each inventory they appear in.
+
+    If `only` is given, other pairs are dropped as early as possible.
+    """
+    size = len(store.segments)
+    languages = store.members[:, 0]
+    phones = store.members[:, 1]
+
+    # Members are sorted by language, then segment ID.
+    bounds = np.flatnonzero(np.diff(languages)) + 1
+    groups = np.split(phones, bounds) if len(phones) else []
+    groups.append(np.unique(phones))
+
+    result = []
+    for group in groups:
+        i, j = np.triu_indices(len(group))
+        codes = encode_pairs(group[i], group[j], size)
+        if only is not None:
+            codes = codes[np.isin(codes, only)]
+        result.append(codes)
+    return np.concatenate(result) if result else np.zeros(0, np.int64)
+
+
+def count_allophones(store: Store) -> Counter[Cooccurrence]:
+    """Same as `simphones.distances.count_allophones`, but computed from the
+    store.
+    """
+    return count_codes(store, allophone_codes(store))
+
+
+def count_cooccurrences(store: Store) -> Counter[Cooccurrence]:
+    """Same as `simphones.distances.count_cooccurrences`, but computed from
+    the store.
+    """
+    return count_codes(store, cooccurrence_codes(store))
+
+
+def create_allophone_graph(store: Store) -> "nx.Graph":
+    """Same as `simphones.distances.create_allophone_graph`, but computed
+    from the store.
+
+    Only cooccurrences of allophones are counted, since the graph doesn't
+    need the others.
+    """
+    codes = allophone_codes(store)
+    cooccurrences = cooccurrence_codes(store, only=np.unique(codes))
+    return allophone_graph(
+        count_codes(store, codes),
+        count_codes(store, cooccurrences),
+    )
+
+
+def parse_args() -> Namespace:
+    """Parse command-line arguments."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-i",
+        "--input",
+        dest="input",
+        default=None,
+        type=Path,
+        help="PHOIBLE CSV file (default: bundled phoible.csv)",
+    )
+    parser.add_argument(
+        "output",
+        type=Path,
+        help="output directory",
+    )
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    """Script entrypoint."""
+    import_phoible(args.output, args.input)
+
+
+if __name__ == "__main__":
+    main(parse_args())
+
+
+__all__ = [
+    "Store",
+    "count_allophones",
+    "count_cooccurrences",
+    "create_allophone_graph",
+    "import_phoible",
+    "load_inventories",
+    "load_store",
+]
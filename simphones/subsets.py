@@ -0,0 +1,121 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Similarity scores computed from subsets of languages.
+
+The scores of a subset are the same as the scores of a dataset that only
+contains the languages in the subset, where the combined inventory ("*") is
+the union of their inventories.
+"""
+
+from argparse import ArgumentParser, Namespace
+from hashlib import sha256
+from pathlib import Path
+import typing as t
+
+import numpy as np
+
+from simphones.bootstrap import Incidence
+from simphones.cache import LRUCache
+from simphones.distances import graph_distances
+from simphones.inventories import (
+    InventoryDataset,
+    LanguageCode,
+    get_phonological_inventories,
+)
+from simphones.similarity import SimilarityData, compute_similarity
+from simphones.utils import save_as_csv
+
+
+def subset_key(languages: t.Iterable[LanguageCode]) -> str:
+    """Return canonical hash of a set of languages."""
+    text = "\n".join(sorted(set(languages) - {"*"}))
+    return sha256(text.encode()).hexdigest()
+
+
+class SubsetSimilarity:
+    """Compute similarity scores of language subsets.
+
+    The per-language counts are precomputed once, so that each subset only
+    needs a weighted sum of them.
+    The results of the `cache_size` most recently used subsets are cached.
+    """
+
+    def __init__(
+        self,
+        inventories: InventoryDataset,
+        cache_size: int = 16,
+    ) -> None:
+        self.incidence = Incidence(inventories)
+        self.columns = {
+            code: column
+            for column, code in enumerate(self.incidence.languages)
+            if code != "*"
+        }
+        self.cache: LRUCache[str, SimilarityData] = LRUCache(cache_size)
+
+    def similarity(
+        self,
+        languages: t.Iterable[LanguageCode],
+    ) -> SimilarityData:
+        """Compute similarity scores of a subset of languages.
+
+        Raises `KeyError` if a language isn't in the dataset, and
+        `ValueError` if the subset has no allophones, or if every distance is
+        0 (e.g. a subset with a single language).
+        """
+        languages = set(languages) - {"*"}
+        return self.cache.get(
+            subset_key(languages),
+            lambda: self.compute(languages),
+        )
+
+    def compute(self, languages: set[LanguageCode]) -> SimilarityData:
+        """Compute similarity scores of a subset without the cache."""
+        weights = np.zeros(len(self.incidence.languages))
+        for code in languages:
+            weights[self.columns[code]] = 1
+
+        graph = self.incidence.graph_from_counts(
+            *self.incidence.combined_counts(weights)
+        )
+        if graph.number_of_edges() == 0:
+            raise ValueError("no allophones in subset")
+
+        # Scores are relative to the largest distance, so they're undefined
+        # if every allophone pair appears in every language of the subset.
+        distances = graph_distances(graph)
+        if max(distances.values()) == 0:
+            raise ValueError("every distance in subset is 0")
+        return compute_similarity(distances)
+
+
+def parse_args() -> Namespace:
+    """Parse command-line arguments."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-o",
+        dest="output",
+        required=True,
+        type=Path,
+        help="output CSV file",
+    )
+    parser.add_argument(
+        "languages",
+        nargs="+",
+        help="Glottocodes of languages in the subset",
+    )
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    """Script entrypoint."""
+    subsets = SubsetSimilarity(get_phonological_inventories(), cache_size=1)
+    save_as_csv(args.output, subsets.similarity(args.languages))
+
+
+if __name__ == "__main__":
+    main(parse_args())
+
+
+__all__ = ["SubsetSimilarity", "subset_key"]
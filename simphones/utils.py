@@ -3,19 +3,37 @@
 # See https://www.gnu.org/licenses/gpl-3.0.en.html
 """Serialization tools."""
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from csv import reader, writer
-from json import dumps
+from hashlib import sha256
+from json import JSONDecodeError, dumps, loads
 from pathlib import Path
+import typing as t
 
 from simphones.distances import unordered
+from simphones.inventories import Phone
 from simphones.normalize import normalize_ipa
 from simphones.similarity import SimilarityData
 
 
+Writer: t.TypeAlias = t.Callable[[Path, SimilarityData, int | None], None]
+
+
 class MalformedDataset(Exception):
     """Raised when reading a file that doesn't contain similarity data."""
 
 
+class OutputJob(t.NamedTuple):
+    """Output file to write.
+
+    `ndigits` is the precision to round similarity scores to.
+    """
+    format: str
+    path: Path
+    ndigits: int | None = None
+
+
 def save_as_csv(
     path: Path,
     similarity: SimilarityData,
@@ -27,18 +45,67 @@ def save_as_csv(
     Set to `None` to disable rounding.
     """
     with open(path, "w", encoding="utf-8") as file:
-        csv_file = writer(file)
-        for (phone1, phone2), score in similarity.items():
-            if phone1 == phone2:
-                continue
-            assert phone1 < phone2
+        writer(file).writerows(csv_rows(similarity, ndigits))
 
-            rounded = score
-            if ndigits is not None:
-                rounded = round(score, ndigits=ndigits)
 
-            row = (phone1, phone2, rounded)
-            csv_file.writerow(row)
+def csv_rows(
+    similarity: SimilarityData,
+    ndigits: int | None = None,
+) -> t.Iterator[tuple[Phone, Phone, float]]:
+    """Generate rows of similarity data CSV file."""
+    for (phone1, phone2), score in similarity.items():
+        if phone1 == phone2:
+            continue
+        rounded = score
+        if ndigits is not None:
+            rounded = round(score, ndigits=ndigits)
+        yield (phone1, phone2, rounded)
+
+
+def save_as_shards(
+    path: Path,
+    similarity: SimilarityData,
+    ndigits: int | None = None,
+    shards: int = 16,
+) -> None:
+    """Save similarity data as a directory of CSV files.
+
+    Phones are numbered in sorted order, and the shard of a phone is its ID
+    modulo `shards`.
+    Each row goes to the shards of both of its phones, so that every pair
+    that contains a phone can be read from the shard of that phone alone.
+    `manifest.json` records the shard of each phone, and the row count and
+    SHA-256 checksum of each shard.
+    """
+    if shards < 1:
+        raise ValueError("expected at least one shard")
+    phones = sorted({phone for pair in similarity for phone in pair})
+    mapping = {phone: index % shards for index, phone in enumerate(phones)}
+    names = [f"{index:04d}.csv" for index in range(shards)]
+    counts = [0] * shards
+
+    path.mkdir(parents=True, exist_ok=True)
+    with ExitStack() as stack:
+        csv_files = [
+            writer(stack.enter_context(
+                open(path/name, "w", encoding="utf-8")
+            ))
+            for name in names
+        ]
+        for row in csv_rows(similarity, ndigits):
+            for shard in sorted({mapping[row[0]], mapping[row[1]]}):
+                csv_files[shard].writerow(row)
+                counts[shard] += 1
+
+    manifest = {
+        "phones": mapping,
+        "shards": [
+            {"path": name, "rows": count, "sha256": checksum(path/name)}
+            for name, count in zip(names, counts)
+        ],
+    }
+    text = dumps(manifest, ensure_ascii=False, indent=2)
+    (path/"manifest.json").write_text(text, encoding="utf-8")
 
 
 def save_as_json(
@@ -55,7 +122,6 @@ def save_as_json(
     for (phone1, phone2), score in similarity.items():
         if phone1 == phone2:
             continue
-        assert phone1 < phone2
 
         rounded = score
         if ndigits is not None:
@@ -67,11 +133,174 @@ def save_as_json(
     path.write_text(text, encoding="utf-8")
 
 
+def save_as_sqlite(
+    path: Path,
+    similarity: SimilarityData,
+    ndigits: int | None = None,
+) -> None:
+    """Save similarity data as an SQLite database.
+
+    Phones are numbered in sorted order in the `phones` table.
+    The `pairs` table stores each pair in both directions with integer keys,
+    so that the neighbors of a phone can be read from the covering index on
+    `(phone1, score, phone2)`.
+    Overwrites `path` if it exists.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    import sqlite3
+
+    rows = list(csv_rows(similarity, ndigits))
+    phones = sorted({phone for row in rows for phone in row[:2]})
+    ids = {phone: index for index, phone in enumerate(phones)}
+
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")
+        with connection:
+            connection.executescript("""
+                CREATE TABLE phones (
+                    id INTEGER PRIMARY KEY,
+                    phone TEXT NOT NULL UNIQUE
+                );
+                CREATE TABLE pairs (
+                    phone1 INTEGER NOT NULL REFERENCES phones (id),
+                    phone2 INTEGER NOT NULL REFERENCES phones (id),
+                    score REAL NOT NULL,
+                    PRIMARY KEY (phone1, phone2)
+                ) WITHOUT ROWID;
+            """)
+            connection.executemany(
+                "INSERT INTO phones VALUES (?, ?)",
+                enumerate(phones),
+            )
+            connection.executemany(
+                "INSERT INTO pairs VALUES (?, ?, ?)",
+                (
+                    pair
+                    for phone1, phone2, score in rows
+                    for pair in (
+                        (ids[phone1], ids[phone2], score),
+                        (ids[phone2], ids[phone1], score),
+                    )
+                ),
+            )
+            connection.execute(
+                "CREATE INDEX pairs_by_score ON pairs (phone1, score, phone2)"
+            )
+    finally:
+        connection.close()
+
+
+def read_from_sqlite(path: Path) -> SimilarityData:
+    """Read similarity data from SQLite database.
+
+    May raise `MalformedDataset`.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    import sqlite3
+
+    if not path.is_file():
+        raise MalformedDataset(f"not a file: {path}")
+
+    similarity = {}
+    connection = sqlite3.connect(
+        f"{path.resolve().as_uri()}?mode=ro",
+        uri=True,
+    )
+    try:
+        rows = connection.execute("""
+            SELECT a.phone, b.phone, score
+            FROM pairs
+            JOIN phones AS a ON a.id = phone1
+            JOIN phones AS b ON b.id = phone2
+            WHERE phone1 < phone2
+        """)
+        for phone1, phone2, score in rows:
+            pair = unordered(normalize_ipa(phone1), normalize_ipa(phone2))
+            similarity[pair] = float(score)
+    except sqlite3.DatabaseError as exc:
+        raise MalformedDataset from exc
+    finally:
+        connection.close()
+    return similarity
+
+
+def checksum(path: Path) -> str:
+    """Return SHA-256 checksum of file."""
+    digest = sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(path: Path) -> dict[str, t.Any]:
+    """Read manifest of sharded similarity data.
+
+    May raise `MalformedDataset`.
+    """
+    try:
+        manifest = loads((path/"manifest.json").read_text(encoding="utf-8"))
+    except (OSError, JSONDecodeError) as exc:
+        raise MalformedDataset from exc
+
+    if not isinstance(manifest, dict) or \
+            not isinstance(manifest.get("phones"), dict) or \
+            not isinstance(manifest.get("shards"), list):
+        raise MalformedDataset
+    return manifest
+
+
+def read_shards(
+    path: Path,
+    shards: t.Iterable[int] | None = None,
+    max_workers: int | None = None,
+) -> SimilarityData:
+    """Read sharded similarity data (see `save_as_shards`).
+
+    Reads only the given `shards` (default: every shard), in a thread pool.
+    May raise `MalformedDataset`, e.g. if a checksum doesn't match, or if
+    there's no shard with the given index.
+    """
+    entries = read_manifest(path)["shards"]
+    if shards is not None:
+        indices = sorted(set(shards))
+        for index in indices:
+            if not isinstance(index, int) or \
+                    not 0 <= index < len(entries):
+                raise MalformedDataset(f"no such shard: {index}")
+        entries = [entries[index] for index in indices]
+
+    def read_shard(entry: dict[str, t.Any]) -> SimilarityData:
+        try:
+            shard = path/entry["path"]
+            expected = entry["sha256"]
+        except (KeyError, TypeError) as exc:
+            raise MalformedDataset from exc
+        if checksum(shard) != expected:
+            raise MalformedDataset(f"checksum mismatch: {shard}")
+        return read_from_csv(shard)
+
+    similarity: SimilarityData = {}
+    if not entries:
+        return similarity
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for data in executor.map(read_shard, entries):
+            similarity.update(data)
+    return similarity
+
+
 def read_from_csv(path: Path) -> SimilarityData:
-    """Read similarity data from CSV file.
+    """Read similarity data from CSV file, or from a directory of shards.
 
     May raise `MalformedDataset`.
     """
+    if path.is_dir():
+        return read_shards(path)
+
     similarity = {}
     with open(path, encoding="utf-8") as file:
         rows = reader(file)
@@ -90,4 +319,82 @@ def read_from_csv(path: Path) -> SimilarityData:
     return similarity
 
 
-__all__ = ["read_from_csv", "save_as_csv", "save_as_json"]
+def read_from_json(path: Path) -> SimilarityData:
+    """Read similarity data from JSON file.
+
+    May raise `MalformedDataset`.
+    """
+    try:
+        data = loads(path.read_text(encoding="utf-8"))["similarity"]
+    except (JSONDecodeError, KeyError, TypeError) as exc:
+        raise MalformedDataset from exc
+
+    similarity = {}
+    for key, score in data.items():
+        phones = key.split(" ")
+        if len(phones) != 2 or not isinstance(score, (int, float)):
+            raise MalformedDataset
+
+        phone1, phone2 = phones
+        pair = unordered(normalize_ipa(phone1), normalize_ipa(phone2))
+        similarity[pair] = float(score)
+    return similarity
+
+
+# Output formats
+writers: dict[str, Writer] = {
+    "csv": save_as_csv,
+    "json": save_as_json,
+    "shards": save_as_shards,
+    "sqlite": save_as_sqlite,
+}
+
+
+def save_all(
+    similarity: SimilarityData,
+    jobs: t.Sequence[OutputJob],
+    max_workers: int | None = None,
+    formats: t.Mapping[str, Writer] | None = None,
+) -> None:
+    """Save similarity data in several formats at once.
+
+    The writers share the same in-memory data and run in a thread pool, so
+    that writing one file overlaps with serializing the others.
+    `formats` overrides the writer of each format (default: `writers`).
+    Raises `KeyError` if some format is unknown.
+    """
+    formats = writers if formats is None else formats
+    for job in jobs:
+        if job.format not in formats:
+            raise KeyError(job.format)
+    if not jobs:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as executor:
+        futures = [
+            executor.submit(
+                formats[job.format],
+                job.path,
+                similarity,
+                job.ndigits,
+            )
+            for job in jobs
+        ]
+        for future in futures:
+            future.result()
+
+
+__all__ = [
+    "OutputJob",
+    "read_from_csv",
+    "read_from_json",
+    "read_from_sqlite",
+    "read_manifest",
+    "read_shards",
+    "save_all",
+    "save_as_csv",
+    "save_as_json",
+    "save_as_shards",
+    "save_as_sqlite",
+    "writers",
+]
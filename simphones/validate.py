@@ -0,0 +1,180 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Check invariants of intermediate data in one vectorized pass.
+
+The computations themselves don't check anything, so validation can be
+turned on or off without slowing them down.
+"""
+
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+
+from simphones.inventories import InventoryDataset
+from simphones.similarity import SimilarityData
+
+if t.TYPE_CHECKING:
+    import networkx as nx   # type: ignore
+
+
+def index_inventories(
+    inventories: InventoryDataset,
+) -> tuple[list[str], list[tuple[int, int]], list[tuple[int, int, int]]]:
+    """Number phones and list the contents of the inventories.
+
+    Returns the phones, (language, phone) pairs, and
+    (language, phone, allophone) triples, where languages and phones are
+    replaced by their positions.
+    """
+    ids: dict[str, int] = {}
+    members: list[tuple[int, int]] = []
+    entries: list[tuple[int, int, int]] = []
+    for language, inventory in enumerate(inventories.values()):
+        for phone, allophones in inventory.items():
+            phone_id = ids.setdefault(phone, len(ids))
+            members.append((language, phone_id))
+            entries.extend(
+                (language, phone_id, ids.setdefault(allophone, len(ids)))
+                for allophone in allophones
+            )
+    return list(ids), members, entries
+
+
+class Violation(t.NamedTuple):
+    """Failed check, with a few examples of the offending items."""
+    check: str
+    total: int
+    examples: list[str]
+
+
+class Report:
+    """Violations found by the checks that were run so far."""
+
+    def __init__(self, max_examples: int = 5) -> None:
+        self.max_examples = max_examples
+        self.violations: list[Violation] = []
+
+    def ok(self) -> bool:
+        """Return `True` if there are no violations."""
+        return not self.violations
+
+    def __str__(self) -> str:
+        lines = []
+        for violation in self.violations:
+            examples = ", ".join(violation.examples)
+            lines.append(
+                f"{violation.check}: {violation.total} ({examples}, ...)"
+            )
+        return "\n".join(lines)
+
+    def add(
+        self,
+        check: str,
+        mask: npt.NDArray[np.bool_],
+        labels: t.Callable[[int], str],
+    ) -> None:
+        """Record violation if `mask` is true anywhere.
+
+        `labels` describes the item at an index.
+        """
+        indices = np.flatnonzero(mask)
+        if len(indices):
+            examples = [
+                labels(index)
+                for index in indices[:self.max_examples].tolist()
+            ]
+            self.violations.append(Violation(check, len(indices), examples))
+
+    def check_inventories(self, inventories: InventoryDataset) -> None:
+        """Check that allophone sets are symmetric.
+
+        Every phone should be an allophone of itself, and every allophone
+        should be in the inventory.
+        This also guarantees that the allophone and cooccurrence counts of a
+        phone with itself are equal.
+        """
+        codes = list(inventories)
+        phones, members, entries = index_inventories(inventories)
+
+        # Encode (language, phone) pairs as integers.
+        weights = np.array([len(phones), 1], dtype=np.int64)
+        member_array = np.array(members, dtype=np.int64).reshape(-1, 2)
+        entry_array = np.array(entries, dtype=np.int64).reshape(-1, 3)
+        member_codes = member_array @ weights
+        reflexive = entry_array[entry_array[:, 1] == entry_array[:, 2], :2]
+
+        def member(index: int) -> str:
+            language, phone = members[index]
+            return f"{codes[language]}: {phones[phone]}"
+
+        def entry(index: int) -> str:
+            language, phone, allophone = entries[index]
+            return f"{codes[language]}: {phones[phone]} ~ {phones[allophone]}"
+
+        self.add(
+            "phone isn't an allophone of itself",
+            ~np.isin(member_codes, reflexive @ weights),
+            member,
+        )
+        self.add(
+            "allophone isn't in inventory",
+            ~np.isin(entry_array[:, [0, 2]] @ weights, member_codes),
+            entry,
+        )
+
+    def check_graph(self, graph: "nx.Graph") -> None:
+        """Check that the allophone graph has no isolated nodes or self-loops,
+        and that its weights are in [0, 1].
+        """
+        nodes = list(graph.nodes)
+        edges = list(graph.edges.data("weight"))
+        degrees = np.fromiter(
+            (degree for _, degree in graph.degree(nodes)),
+            dtype=np.int64,
+            count=len(nodes),
+        )
+        weights = np.fromiter(
+            (weight for _, _, weight in edges),
+            dtype=np.float64,
+            count=len(edges),
+        )
+        loops = np.fromiter(
+            (a == b for a, b, _ in edges),
+            dtype=np.bool_,
+            count=len(edges),
+        )
+
+        self.add("isolated node", degrees == 0, lambda i: nodes[i])
+        self.add("self-loop", loops, lambda i: edges[i][0])
+        self.add(
+            "edge weight isn't in [0, 1]",
+            ~((weights >= 0) & (weights <= 1)),
+            lambda i: f"{edges[i][0]} ~ {edges[i][1]}: {edges[i][2]}",
+        )
+
+    def check_similarity(self, similarity: SimilarityData) -> None:
+        """Check that pairs are ordered and scores are in [0, 1]."""
+        pairs = list(similarity)
+        first = np.array([a for a, _ in pairs], dtype=np.str_)
+        second = np.array([b for _, b in pairs], dtype=np.str_)
+        scores = np.fromiter(
+            similarity.values(),
+            dtype=np.float64,
+            count=len(pairs),
+        )
+
+        self.add(
+            "pair isn't ordered",
+            first > second,
+            lambda i: " ".join(pairs[i]),
+        )
+        self.add(
+            "score isn't in [0, 1]",
+            ~((scores >= 0) & (scores <= 1)),
+            lambda i: f"{' '.join(pairs[i])}: {scores[i]}",
+        )
+
+
+__all__ = ["Report", "Violation"]
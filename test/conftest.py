@@ -4,7 +4,7 @@
 # pylint: disable=redefined-outer-name
 """Some pytest stuff."""
 
-from csv import reader
+from csv import reader, writer
 from pathlib import Path
 
 import pytest
@@ -34,3 +34,30 @@ def phoible_rows(phoible: Path) -> list[tuple[str, ...]]:
         rows = reader(file)
         next(rows)
         return [tuple(row) for row in rows]
+
+
+@pytest.fixture
+def phoible_sample(tmp_path: Path) -> Path:
+    """Return path to a small CSV file in the same format as PHOIBLE."""
+    header = [
+        "InventoryID", "Glottocode", "ISO6393", "LanguageName",
+        "SpecificDialect", "GlyphID", "Phoneme", "Allophones",
+    ]
+    rows = [
+        ["1", "aaaa1234", "aaa", "A", "NA", "0", "t", "t d"],
+        ["1", "aaaa1234", "aaa", "A", "NA", "0", "d", "d"],
+        ["1", "aaaa1234", "aaa", "A", "NA", "0", "a", "a ə <a>"],
+        ["2", "bbbb1234", "bbb", "B", "NA", "0", "t̪|t", "t̪ t"],
+        ["2", "bbbb1234", "bbb", "B", "NA", "0", "tʂ", "NA"],
+        ["2", "bbbb1234", "bbb", "B", "NA", "0", "a", "a ɐ"],
+        ["3", "NA", "ccc", "C Language", "NA", "0", "n̊", "n̊ n"],
+        ["3", "NA", "ccc", "C Language", "NA", "0", "t", "t tʰ"],
+        ["3", "NA", "ccc", "C Language", "NA", "0", "a", ""],
+        ["4", "aaaa1234", "aaa", "A", "NA", "0", "ʔ", "ʔ"],
+    ]
+    path = tmp_path/"phoible.csv"
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        csv_file = writer(file)
+        csv_file.writerow(header)
+        csv_file.writerows(rows)
+    return path
@@ -0,0 +1,119 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+# pylint: disable=redefined-outer-name
+"""Test simphones.alignment."""
+
+from random import Random
+import typing as t
+
+import pytest
+
+from simphones.alignment import (
+    SubstitutionMatrix,
+    _worker,
+    align,
+    edit_distance,
+    many_vs_many,
+    one_vs_many,
+)
+
+
+@pytest.fixture
+def matrix() -> SubstitutionMatrix:
+    """Return small substitution matrix."""
+    return SubstitutionMatrix({
+        ("d", "t"): 0.9,
+        ("b", "p"): 0.8,
+        ("p", "t"): 0.4,
+    })
+
+
+def reference(
+    matrix: SubstitutionMatrix,
+    first: list[str],
+    second: list[str],
+) -> float:
+    """Compute edit distance with a plain dynamic programming loop."""
+    def cost(a: str, b: str) -> float:
+        matrix.extend([a, b])
+        return float(matrix.costs[matrix.ids[a], matrix.ids[b]])
+
+    m, n = len(first), len(second)
+    table = [[0.0] * (n + 1) for _ in range(m + 1)]
+    for i in range(m + 1):
+        for j in range(n + 1):
+            if i == 0 or j == 0:
+                table[i][j] = float(i + j)
+                continue
+            table[i][j] = min(
+                table[i-1][j-1] + cost(first[i-1], second[j-1]),
+                table[i-1][j] + 1,
+                table[i][j-1] + 1,
+            )
+    return table[m][n]
+
+
+def test_edit_distance(matrix: SubstitutionMatrix) -> None:
+    """Similar phones should be cheaper to substitute."""
+    assert edit_distance(matrix, ["t", "a"], ["t", "a"]) == 0
+    assert edit_distance(matrix, ["t", "a"], ["d", "a"]) == pytest.approx(0.1)
+    assert edit_distance(matrix, ["t", "a"], ["x", "a"]) == pytest.approx(1)
+    assert edit_distance(matrix, [], ["d", "a"]) == 2
+
+
+def test_batches_match_reference(matrix: SubstitutionMatrix) -> None:
+    """Vectorized results should match the plain implementation."""
+    rng = Random(0)
+    alphabet = "ptdbaxy"
+    sequences = [
+        rng.choices(alphabet, k=rng.randrange(8)) for _ in range(20)
+    ]
+
+    result = many_vs_many(matrix, sequences[:5], sequences, chunksize=2)
+    assert not _worker, "shared state should be released"
+    assert result.shape == (5, 20)
+    for i, query in enumerate(sequences[:5]):
+        row = one_vs_many(matrix, query, sequences)
+        for j, target in enumerate(sequences):
+            expected = reference(matrix, query, target)
+            assert result[i, j] == pytest.approx(expected)
+            assert row[j] == pytest.approx(expected)
+
+
+def test_many_vs_many_process_pool(matrix: SubstitutionMatrix) -> None:
+    """The process pool should give the same result."""
+    sequences = [["t", "a"], ["d", "a", "p"], ["b"], []]
+    expected = many_vs_many(matrix, sequences, sequences)
+    result = many_vs_many(matrix, sequences, sequences, 2, chunksize=1)
+    assert result.tolist() == expected.tolist()
+
+
+def test_align(matrix: SubstitutionMatrix) -> None:
+    """Alignment should pair up similar phones."""
+    distance, alignment = align(matrix, ["a", "t", "a"], ["d", "a"])
+    assert distance == pytest.approx(1.1)
+    assert alignment == [("a", None), ("t", "d"), ("a", "a")]
+
+
+def test_batches_extend_matrix_once(
+    matrix: SubstitutionMatrix,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """New phones in a batch should only grow the cost matrix once."""
+    sizes: list[int] = []
+    extend = matrix.extend
+
+    def counting_extend(phones: t.Iterable[str]) -> None:
+        extend(phones)
+        sizes.append(len(matrix.phones))
+
+    monkeypatch.setattr(matrix, "extend", counting_extend)
+    queries = [["x", "a"], ["y"]]
+    targets = [["z"], ["t", "w"], ["v"]]
+    many_vs_many(matrix, queries, targets)
+    one_vs_many(matrix, ["q"], [["r"], ["s"]])
+
+    assert sizes == [10, 13]
+    assert set("xyzwvqrs") <= set(matrix.ids)
+    assert matrix.costs.shape == (13, 13)
@@ -0,0 +1,49 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test tools.benchmark."""
+
+from tools.benchmark import compare, format_table
+
+
+def test_compare_flags_slow_and_large_stages() -> None:
+    """Stages that exceed the tolerance should be reported as regressions."""
+    baseline = {
+        "fast": {"seconds": 1.0, "peak_bytes": 100.0},
+        "slow": {"seconds": 1.0, "peak_bytes": 100.0},
+        "large": {"seconds": 1.0, "peak_bytes": 100.0},
+    }
+    results = {
+        "fast": {"seconds": 1.2, "peak_bytes": 100.0},
+        "slow": {"seconds": 2.0, "peak_bytes": 100.0},
+        "large": {"seconds": 1.0, "peak_bytes": 200.0},
+        "new": {"seconds": 9.0, "peak_bytes": 900.0},
+    }
+    regressions = compare(baseline, results, 0.5, 0.2, 0.01)
+    assert regressions == ["slow", "large"]
+
+    table = format_table(baseline, results, regressions)
+    assert "REGRESSED" in table
+    assert len(table.splitlines()) == 2 + len(results)
+
+
+def test_compare_ignores_noise() -> None:
+    """Slowdowns below `min_seconds` shouldn't count as regressions."""
+    baseline = {"tiny": {"seconds": 0.001, "peak_bytes": 100.0}}
+    results = {"tiny": {"seconds": 0.005, "peak_bytes": 100.0}}
+    assert not compare(baseline, results, 0.5, 0.2, 0.01)
+
+
+def test_compare_reports_missing_stages() -> None:
+    """Stages in the baseline that didn't run should be reported."""
+    baseline = {
+        "kept": {"seconds": 1.0, "peak_bytes": 100.0},
+        "gone": {"seconds": 1.0, "peak_bytes": 100.0},
+    }
+    results = {"kept": {"seconds": 1.0, "peak_bytes": 100.0}}
+    regressions = compare(baseline, results, 0.5, 0.2, 0.01)
+    assert regressions == ["gone"]
+
+    table = format_table(baseline, results, regressions)
+    assert "MISSING" in table
+    assert len(table.splitlines()) == 2 + len(baseline)
@@ -0,0 +1,114 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.bootstrap."""
+
+import numpy as np
+import pytest
+
+from simphones.bootstrap import (
+    Accumulator,
+    _worker,
+    Incidence,
+    bootstrap,
+    resample,
+    sample_similarity,
+)
+from simphones.distances import compute_distances, create_allophone_graph
+from simphones.inventories import InventoryDataset
+from simphones.similarity import compute_similarity
+from tools.synthetic import generate_inventories
+
+
+def test_incidence_graph_with_unit_weights() -> None:
+    """With every language counted once, the graph should be the same as the
+    allophone graph.
+    """
+    inventories = generate_inventories(languages=30, phones=40, seed=1)
+    incidence = Incidence(inventories)
+    graph = incidence.graph(np.ones(len(incidence.languages)))
+    expected = create_allophone_graph(inventories)
+
+    assert set(graph.nodes) == set(expected.nodes)
+    assert set(map(frozenset, graph.edges)) == set(
+        map(frozenset, expected.edges)
+    )
+    for a, b, weight in expected.edges.data("weight"):
+        assert graph.edges[(a, b)]["weight"] == pytest.approx(weight)
+
+
+def resampled_inventories(
+    incidence: Incidence,
+    inventories: InventoryDataset,
+    weights: np.ndarray,
+) -> InventoryDataset:
+    """Copy each drawn language once per draw, and recompute the combined
+    inventory.
+    """
+    result: InventoryDataset = {"*": {}}
+    for code, draws in zip(incidence.languages, weights.tolist()):
+        for draw in range(int(draws)):
+            result[f"{code}#{draw}"] = inventories[code]
+            for phone, allophones in inventories[code].items():
+                result["*"].setdefault(phone, set()).update(allophones)
+    return result
+
+
+def test_sample_matches_resampled_dataset() -> None:
+    """A bootstrap sample should have the same scores as the pipeline run on
+    the resampled dataset.
+    """
+    inventories = generate_inventories(
+        languages=30,
+        phones=40,
+        inventory_size=10,
+        seed=5,
+    )
+    incidence = Incidence(inventories)
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        weights = resample(incidence, rng)
+        assert incidence.combined is not None
+        assert weights[incidence.combined] == 0
+
+        expected = compute_similarity(compute_distances(
+            resampled_inventories(incidence, inventories, weights)
+        ))
+        actual = sample_similarity(incidence, weights)
+        assert actual.keys() == expected.keys()
+        for pair, score in expected.items():
+            assert actual[pair] == pytest.approx(score)
+
+
+def test_accumulator_merge() -> None:
+    """Merged running statistics should match statistics of all samples."""
+    rng = np.random.default_rng(0)
+    samples = rng.random((10, 3))
+
+    first = Accumulator(3)
+    second = Accumulator(3)
+    for sample in samples[:4]:
+        first.add(sample)
+    for sample in samples[4:]:
+        second.add(sample)
+    first.merge(second)
+
+    assert first.count == 10
+    assert np.allclose(first.mean, samples.mean(axis=0))
+    assert np.allclose(first.std(), samples.std(axis=0, ddof=1))
+
+
+def test_bootstrap_is_reproducible() -> None:
+    """The result shouldn't depend on the number of processes."""
+    inventories = generate_inventories(languages=20, phones=20, seed=2)
+    serial = bootstrap(inventories, samples=6, processes=1, chunksize=2)
+    parallel = bootstrap(inventories, samples=6, processes=2, chunksize=2)
+
+    assert serial.samples == 6
+    assert not _worker, "shared state should be released"
+    assert serial.pairs == parallel.pairs
+    assert np.allclose(serial.mean, parallel.mean)
+    assert np.allclose(serial.std, parallel.std)
+
+    for low, high in serial.intervals().values():
+        assert 0 <= low <= high <= 1
@@ -0,0 +1,69 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.explain."""
+
+import networkx as nx   # type: ignore
+import pytest
+
+from simphones.cache import LRUCache
+from simphones.explain import Explainer
+from tools.synthetic import generate_inventories
+
+
+def test_explain_matches_shortest_paths() -> None:
+    """Explanations should agree with networkx shortest paths."""
+    inventories = generate_inventories(languages=30, phones=40, seed=2)
+    explainer = Explainer(inventories, cache_size=4)
+    graph = explainer.graph
+
+    phones = sorted(graph.nodes)
+    for a in phones[:5]:
+        lengths = nx.single_source_dijkstra_path_length(graph, a)
+        for b in phones[-5:]:
+            explanation = explainer.explain(b, a)
+            if b not in lengths:
+                assert explanation is None
+                continue
+
+            assert explanation is not None
+            assert explanation.path[0] == b
+            assert explanation.path[-1] == a
+            assert explanation.distance == pytest.approx(lengths[b])
+            assert sum(step.weight for step in explanation.steps) == \
+                pytest.approx(explanation.distance)
+            for step in explanation.steps:
+                assert step.languages
+                for code in step.languages:
+                    assert step.target in inventories[code][step.source]
+    assert len(explainer.trees) <= 4
+
+
+def test_explain_same_phone() -> None:
+    """A phone should be at distance 0 from itself."""
+    inventories = generate_inventories(languages=10, phones=20, seed=0)
+    explainer = Explainer(inventories)
+    phone = next(iter(explainer.graph.nodes))
+    explanation = explainer.explain(phone, phone)
+    assert explanation is not None
+    assert explanation.path == [phone]
+    assert explanation.distance == 0
+    assert not explanation.steps
+
+
+def test_explain_unknown_phone() -> None:
+    """There's no explanation for phones that aren't in the graph."""
+    explainer = Explainer(generate_inventories(languages=10, phones=20))
+    assert explainer.explain("p0000", "unknown") is None
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    """The least recently used entry should be evicted first."""
+    cache: LRUCache[str, int] = LRUCache(2)
+    assert cache.get("a", lambda: 1) == 1
+    assert cache.get("b", lambda: 2) == 2
+    assert cache.get("a", lambda: 0) == 1
+    assert cache.get("c", lambda: 3) == 3
+    assert "a" in cache
+    assert "b" not in cache
+    assert (cache.hits, cache.misses) == (1, 3)
@@ -0,0 +1,62 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test tools.histogram."""
+
+import gzip
+from pathlib import Path
+from random import Random
+
+import pytest
+
+from simphones.utils import MalformedDataset, save_as_csv
+from tools.histogram import compute_stats
+
+
+def test_compute_stats_matches_exact_statistics(tmp_path: Path) -> None:
+    """Streaming statistics should agree with statistics of the full data."""
+    rng = Random(0)
+    phones = sorted(f"p{i}" for i in range(30))
+    data = {
+        (a, b): rng.random()
+        for i, a in enumerate(phones)
+        for b in phones[i+1:]
+    }
+    path = tmp_path/"out.csv"
+    save_as_csv(path, data)
+
+    summary = compute_stats(path, bins=4, chunk_size=7).summary()
+    scores = sorted(data.values())
+
+    assert summary["count"] == len(scores)
+    counts = summary["histogram"]["counts"]
+    assert counts == [
+        sum(1 for score in scores if i/4 <= score < (i+1)/4)
+        for i in range(4)
+    ]
+
+    median = scores[len(scores) // 2]
+    assert summary["quantiles"]["0.5"] == pytest.approx(median, abs=0.01)
+
+    p0 = summary["phones"]["p0"]
+    p0_scores = [score for pair, score in data.items() if "p0" in pair]
+    assert p0["count"] == len(p0_scores)
+    assert p0["mean"] == pytest.approx(sum(p0_scores) / len(p0_scores))
+    assert p0["min"] == min(p0_scores)
+    assert p0["max"] == max(p0_scores)
+
+
+def test_compute_stats_gzip(tmp_path: Path) -> None:
+    """Gzipped output files should be readable."""
+    path = tmp_path/"out.csv.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        file.write("a,b,0.5\na,c,0.25\n")
+    assert compute_stats(path).summary()["count"] == 2
+
+
+def test_compute_stats_malformed(tmp_path: Path) -> None:
+    """Files that don't contain similarity data should be rejected."""
+    path = tmp_path/"out.csv"
+    path.write_text("a,b,c\n", encoding="utf-8")
+    with pytest.raises(MalformedDataset):
+        compute_stats(path)
@@ -0,0 +1,99 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.landmarks."""
+
+import networkx as nx   # type: ignore
+import pytest
+
+from simphones.distances import (
+    compute_distances,
+    create_allophone_graph,
+    graph_distances,
+    shortest_path_lengths,
+)
+from simphones.landmarks import landmark_distances, select_landmarks
+from tools.synthetic import generate_inventories
+
+
+def test_landmark_distances_bound_exact_distances() -> None:
+    """Estimates should never be shorter than the exact distances, and the
+    nearest neighbors should be exact.
+    """
+    inventories = generate_inventories(languages=100, phones=120, seed=5)
+    graph = create_allophone_graph(inventories)
+    exact = shortest_path_lengths(graph)
+
+    errors = []
+    for candidates in (0, 10):
+        approximate = landmark_distances(graph, 4, candidates)
+        assert approximate.keys() == exact.keys()
+        for pair, distance in exact.items():
+            assert approximate[pair] >= distance - 1e-9
+        errors.append(sum(approximate.values()) - sum(exact.values()))
+    assert errors[1] < errors[0]
+
+    for node in graph.nodes:
+        lengths = nx.single_source_dijkstra_path_length(graph, node)
+        expected = sorted(
+            length for other, length in lengths.items() if other != node
+        )
+        actual = sorted(
+            distance
+            for pair, distance in approximate.items()
+            if node in pair and pair[0] != pair[1]
+        )
+        assert actual[:10] == pytest.approx(expected[:10])
+
+
+def test_landmark_distances_disconnected_graph() -> None:
+    """Pairs in different components shouldn't have distances."""
+    graph = nx.Graph()
+    graph.add_weighted_edges_from([
+        ("a", "b", 0.5), ("b", "c", 0.5), ("c", "d", 0.5),
+        ("x", "y", 0.25), ("y", "z", 0.5),
+    ])
+    exact = shortest_path_lengths(graph)
+    approximate = landmark_distances(graph, landmarks=1, candidates=0)
+    assert approximate.keys() == exact.keys()
+    assert approximate[("b", "c")] == 1.5
+
+    approximate = landmark_distances(graph, landmarks=1, candidates=3)
+    assert approximate == exact
+
+
+def test_select_landmarks() -> None:
+    """Landmarks should be far apart."""
+    graph = nx.path_graph("abcdefghij")
+    landmarks, distances = select_landmarks(graph, sorted(graph.nodes), 2)
+    assert landmarks == ["a", "j"]
+    assert distances.shape == (2, 10)
+
+
+def test_compute_distances_with_landmarks() -> None:
+    """With enough refined candidates, the approximation should be exact."""
+    inventories = generate_inventories(languages=30, phones=30, seed=6)
+    exact = compute_distances(inventories)
+    approximate = compute_distances(inventories, landmarks=2, candidates=30)
+    assert approximate.keys() == exact.keys()
+    for pair, distance in exact.items():
+        assert approximate[pair] == pytest.approx(distance)
+
+
+@pytest.mark.parametrize("landmarks,candidates", [(0, 10), (-1, 10), (4, -1)])
+def test_landmark_distances_invalid_parameters(
+    landmarks: int,
+    candidates: int,
+) -> None:
+    """Invalid parameters should be rejected before the graph is modified.
+    """
+    graph = create_allophone_graph(generate_inventories(10, 20))
+    edges = graph.number_of_edges()
+    with pytest.raises(ValueError):
+        landmark_distances(graph, landmarks, candidates)
+    with pytest.raises(ValueError):
+        graph_distances(graph, landmarks, candidates)
+    assert graph.number_of_edges() == edges
+
+    with pytest.raises(ValueError):
+        select_landmarks(graph, sorted(graph.nodes), 0)
@@ -0,0 +1,97 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.languages."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from simphones.distances import compute_distances
+from simphones.inventories import InventoryDataset, LanguageCode
+from simphones.languages import (
+    _worker,
+    language_similarity,
+    load_language_similarity,
+    save_language_similarity,
+)
+from simphones.query import SimilarityIndex
+from simphones.similarity import compute_similarity
+from tools.synthetic import generate_inventories
+
+
+def brute_force(
+    inventories: InventoryDataset,
+    index: SimilarityIndex,
+    language1: LanguageCode,
+    language2: LanguageCode,
+) -> float:
+    """Compute language similarity straight from the definition."""
+    def mean_match(a: LanguageCode, b: LanguageCode) -> float:
+        return sum(
+            max(index.similarity(x, y) for y in inventories[b])
+            for x in inventories[a]
+        ) / len(inventories[a])
+    return (mean_match(language1, language2) +
+            mean_match(language2, language1)) / 2
+
+
+def test_language_similarity_matches_definition() -> None:
+    """Scores should follow the definition, and identical inventories
+    should be deduplicated.
+    """
+    inventories = generate_inventories(
+        languages=12,
+        phones=25,
+        inventory_size=10,
+        seed=7,
+    )
+    inventories["copy"] = dict(inventories["lang0003"])
+    similarity = compute_similarity(compute_distances(inventories))
+    index = SimilarityIndex(similarity)
+
+    result = language_similarity(
+        inventories,
+        similarity,
+        processes=1,
+        block_size=5,
+    )
+    assert len(result.languages) == 13
+    assert not _worker, "shared state should be released"
+    assert len(result.scores) == 12
+    assert np.allclose(result.scores, result.scores.T)
+
+    for a in ("lang0000", "lang0003", "copy"):
+        for b in ("lang0001", "lang0003", "lang0011"):
+            assert result.score(a, b) == pytest.approx(
+                brute_force(inventories, index, a, b),
+                abs=1e-6,
+            )
+    assert result.score("copy", "lang0003") == pytest.approx(1)
+
+
+def test_save_language_similarity(tmp_path: Path) -> None:
+    """The saved matrix should be memory-mappable and expanded to every
+    language.
+    """
+    inventories = generate_inventories(
+        languages=6,
+        phones=15,
+        inventory_size=5,
+        seed=8,
+    )
+    inventories["copy"] = dict(inventories["lang0000"])
+    similarity = compute_similarity(compute_distances(inventories))
+    result = language_similarity(inventories, similarity, processes=1)
+
+    path = tmp_path/"languages.npy"
+    save_language_similarity(path, result, block_size=2)
+    languages, matrix = load_language_similarity(path)
+
+    assert languages == result.languages
+    assert isinstance(matrix, np.memmap)
+    assert matrix.shape == (7, 7)
+    for i, a in enumerate(languages):
+        for j, b in enumerate(languages):
+            assert matrix[i, j] == result.score(a, b)
@@ -0,0 +1,69 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.__main__."""
+
+from pathlib import Path
+
+import pytest
+
+from simphones.__main__ import parse_args
+from simphones.utils import OutputJob
+
+
+def test_parse_args_single_output() -> None:
+    """The old single-output usage should still work."""
+    args = parse_args(["-f", "json", "-n", "3", "out.json"])
+    assert args.jobs == [OutputJob("json", Path("out.json"), 3)]
+
+    args = parse_args(["out.csv"])
+    assert args.jobs == [OutputJob("csv", Path("out.csv"), None)]
+
+
+def test_parse_args_multiple_outputs() -> None:
+    """Each output file can have its own format and precision."""
+    args = parse_args([
+        "-f", "csv", "-n", "3",
+        "-f", "json", "-n", "none",
+        "out.csv", "out.json",
+    ])
+    assert args.jobs == [
+        OutputJob("csv", Path("out.csv"), 3),
+        OutputJob("json", Path("out.json"), None),
+    ]
+
+    args = parse_args(["-n", "2", "a.csv", "b.csv"])
+    assert [job.ndigits for job in args.jobs] == [2, 2]
+
+
+def test_parse_args_mismatched_outputs() -> None:
+    """The number of formats should match the number of output files."""
+    with pytest.raises(SystemExit):
+        parse_args(["-f", "csv", "-f", "json", "out.csv"])
+
+
+def test_parse_args_validate() -> None:
+    """Validation should be on unless it's turned off."""
+    assert parse_args(["out.csv"]).validate
+    assert not parse_args(["--no-validate", "out.csv"]).validate
+
+
+def test_parse_args_rules() -> None:
+    """Rule files should be optional."""
+    assert parse_args(["out.csv"]).rules is None
+    assert parse_args(["--rules", "r.json", "out.csv"]).rules == \
+        Path("r.json")
+
+
+def test_parse_args_shards() -> None:
+    """The number of shards should be positive."""
+    assert parse_args(["out.csv"]).shards == 16
+    assert parse_args(["--shards", "4", "-f", "shards", "out"]).shards == 4
+    with pytest.raises(SystemExit):
+        parse_args(["--shards", "0", "-f", "shards", "out"])
+
+
+def test_parse_args_store_with_rules() -> None:
+    """Rule files shouldn't be accepted for preprocessed stores."""
+    with pytest.raises(SystemExit):
+        parse_args(["--store", "store", "--rules", "r.json", "out.csv"])
@@ -0,0 +1,93 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+# pylint: disable=redefined-outer-name
+"""Test simphones.query."""
+
+from pathlib import Path
+import subprocess
+import sys
+from time import perf_counter
+
+import pytest
+
+from simphones.query import (
+    Index,
+    SimilarityIndex,
+    SqliteIndex,
+    load_index,
+    read_data,
+)
+from simphones.utils import save_as_csv, save_as_json, save_as_sqlite
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def index(request: pytest.FixtureRequest, tmp_path: Path) -> Index:
+    """Return small lookup table, in memory or in an SQLite file."""
+    data = {
+        ("a", "b"): 0.5,
+        ("a", "c"): 0.25,
+        ("b", "c"): 0.75,
+    }
+    if request.param == "memory":
+        return SimilarityIndex(data)
+
+    path = tmp_path/"out.sqlite"
+    save_as_sqlite(path, data)
+    return load_index(path)
+
+
+def test_similarity_follows_readme_interpretation(
+    index: Index,
+) -> None:
+    """Lookups should be symmetric, reflexive and default to 0."""
+    assert index.similarity("a", "b") == index.similarity("b", "a") == 0.5
+    assert index.similarity("a", "a") == 1.0
+    assert index.similarity("z", "z") == 1.0
+    assert index.similarity("a", "z") == 0.0
+
+
+def test_most_similar(index: Index) -> None:
+    """Neighbors should be sorted from most to least similar."""
+    assert index.most_similar("c") == [("b", 0.75), ("a", 0.25)]
+    assert index.most_similar("c", 1) == [("b", 0.75)]
+    assert not index.most_similar("z")
+
+
+def test_load_index(tmp_path: Path) -> None:
+    """CSV, JSON and SQLite output files should give the same data."""
+    data = {("a", "b"): 0.5, ("b", "c"): 0.75}
+    save_as_csv(tmp_path/"out.csv", data)
+    save_as_json(tmp_path/"out.json", data)
+    save_as_sqlite(tmp_path/"out.db", data)
+
+    assert read_data(tmp_path/"out.csv") == data
+    assert read_data(tmp_path/"out.json") == data
+    assert read_data(tmp_path/"out.db") == data
+
+    index = load_index(tmp_path/"out.db")
+    assert isinstance(index, SqliteIndex)
+    assert index.above("b", 0.6) == [("c", 0.75)]
+
+
+def test_cold_start(tmp_path: Path) -> None:
+    """Querying shouldn't import heavy dependencies."""
+    path = tmp_path/"out.csv"
+    save_as_csv(path, {("a", "b"): 0.5})
+
+    start = perf_counter()
+    result = subprocess.run(
+        [
+            sys.executable, "-X", "importtime",
+            "-m", "simphones", "query", str(path), "a", "b",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    elapsed = perf_counter() - start
+
+    assert result.stdout.strip() == "0.5"
+    for module in ("networkx", "matplotlib", "numpy"):
+        assert module not in result.stderr
+    assert elapsed < 5, f"cold start took {elapsed:.2f}s"
@@ -0,0 +1,109 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.rules."""
+
+from json import dumps
+from pathlib import Path
+from random import Random
+
+import pytest
+
+from simphones.inventories import get_phonological_inventories
+from simphones.normalize import normalize_ipa
+from simphones.rules import (
+    COMBINING_RING_ABOVE,
+    COMBINING_RING_BELOW,
+    MalformedRules,
+    RuleEngine,
+)
+
+
+def reference_substitute(phone: str) -> str:
+    """Substitute glyphs one rule at a time, like the original pipeline."""
+    substitutions = {
+        "tʂ": "ʈʂ",
+        "tʂʼ": "ʈʂʼ",
+        "tʃː": "t̠ʃː",
+        COMBINING_RING_ABOVE: COMBINING_RING_BELOW,
+    }
+    for key, value in substitutions.items():
+        phone = phone.replace(key, value)
+    return phone
+
+
+def reference_parse_allophones(text: str) -> set[str]:
+    """Parse allophones like the original pipeline."""
+    if text in ("", "NA"):
+        return set()
+
+    text = text.replace(COMBINING_RING_ABOVE, COMBINING_RING_BELOW)
+    allophones: set[str] = set()
+    for allophone in text.split():
+        if any(bracket in allophone for bracket in "<>⟨⟩"):
+            continue
+        allophones.update(map(normalize_ipa, allophone.split("|")))
+    return set(map(reference_substitute, allophones))
+
+
+def reference_parse_segment(
+    phoneme_text: str,
+    allophones_text: str,
+) -> tuple[str, frozenset[str]]:
+    """Parse segment like the original pipeline."""
+    raw_phoneme = reference_substitute(phoneme_text)
+    allophones = reference_parse_allophones(allophones_text)
+    if "|" in raw_phoneme:
+        raw_phoneme, *rest = raw_phoneme.split("|")
+        allophones.update(reference_parse_allophones(" ".join(rest)))
+    return normalize_ipa(raw_phoneme), frozenset(allophones)
+
+
+def test_default_rules_match_original_pipeline() -> None:
+    """The compiled rules should give the same output as the original
+    pipeline.
+    """
+    symbols = [
+        "t", "ʂ", "ʼ", "ʃ", "ː", "a", "å", "n", "ʰ", "|", " ", "<", "⟩",
+        COMBINING_RING_ABOVE, COMBINING_RING_BELOW,
+        "̃", "̪", "̠", "̰", "ʷ", "NA",
+    ]
+    rng = Random(0)
+    engine = RuleEngine()
+    for _ in range(5000):
+        phoneme = "".join(rng.choices(symbols, k=rng.randint(0, 6)))
+        allophones = "".join(rng.choices(symbols, k=rng.randint(0, 12)))
+        assert engine.parse_segment(phoneme, allophones) == \
+            reference_parse_segment(phoneme, allophones)
+
+
+def test_rule_file(tmp_path: Path, phoible_sample: Path) -> None:
+    """User rules should override the default rules."""
+    path = tmp_path/"rules.json"
+    path.write_text(
+        dumps({"substitutions": {"tʰ": "tʼ"}, "graphemes": ""}),
+        encoding="utf-8",
+    )
+    inventories = get_phonological_inventories(
+        phoible_sample,
+        RuleEngine.from_file(path),
+    )
+    assert "tʼ" in inventories["CLanguage"]["t"]
+    assert "<a>" in inventories["aaaa1234"]["a"]
+    assert "tʂ" in inventories["bbbb1234"]
+
+
+@pytest.mark.parametrize("text", [
+    "[]",
+    "{",
+    '{"unknown": 1}',
+    '{"separator": ""}',
+    '{"modifiers": {"ab": 1}}',
+    '{"substitutions": {"a": 1}}',
+])
+def test_malformed_rule_file(tmp_path: Path, text: str) -> None:
+    """Invalid rule files should be rejected."""
+    path = tmp_path/"rules.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(MalformedRules):
+        RuleEngine.from_file(path)
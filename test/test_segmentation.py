@@ -0,0 +1,60 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.segmentation."""
+
+from pathlib import Path
+
+import pytest
+
+from simphones.segmentation import Tokenizer, UnknownSegment
+from simphones.utils import save_as_csv
+
+
+def test_tokenize_longest_match() -> None:
+    """The tokenizer should prefer longer phones."""
+    tokenizer = Tokenizer(["t", "s", "ts", "tʰ", "a", "aː"])
+    assert tokenizer.tokenize("tsaː tʰa") == ["ts", "aː", "tʰ", "a"]
+    assert tokenizer.tokenize_many(["ta", "", "sts"]) == [
+        ["t", "a"], [], ["s", "ts"],
+    ]
+
+
+def test_tokenize_normalizes_input() -> None:
+    """Input should be normalized like the inventory."""
+    tokenizer = Tokenizer(["ã̰"])
+    assert tokenizer.tokenize("ã̰") == ["ã̰"]
+
+
+def test_tokenize_unknown_symbols() -> None:
+    """Unknown symbols should become single tokens, unless in strict mode."""
+    assert Tokenizer(["t"]).tokenize("tx") == ["t", "x"]
+    assert Tokenizer(["t"]).tokenize("xʷʰt") == ["xʷʰ", "t"]
+    with pytest.raises(UnknownSegment):
+        Tokenizer(["t"], strict=True).tokenize("tx")
+
+
+def test_tokenize_unknown_modifiers() -> None:
+    """Unknown modifiers should stay with the preceding symbol."""
+    tokenizer = Tokenizer(["t", "tʰ", "a"])
+    assert tokenizer.tokenize("tʰʷa") == ["tʰʷ", "a"]
+    assert tokenizer.tokenize("aːtʰ") == ["aː", "tʰ"]
+    assert tokenizer.tokenize("ʷa") == ["ʷ", "a"]
+
+
+def test_tokenize_cache() -> None:
+    """Cached results should be the same as uncached ones."""
+    phones = ["p", "a", "pʰ"]
+    cached = Tokenizer(phones)
+    uncached = Tokenizer(phones, cache_size=0)
+    for text in ["pʰapa", "pʰapa pa", "pʰapa"]:
+        assert cached.tokenize(text) == uncached.tokenize(text)
+    assert not uncached.cache
+    assert cached.cache
+
+
+def test_from_file(tmp_path: Path) -> None:
+    """The tokenizer should know the phones in the output file."""
+    path = tmp_path/"out.csv"
+    save_as_csv(path, {("d", "t"): 0.9, ("t", "tʰ"): 0.8})
+    assert Tokenizer.from_file(path).tokenize("tʰdt") == ["tʰ", "d", "t"]
@@ -0,0 +1,157 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+# pylint: disable=redefined-outer-name
+"""Test simphones.server."""
+
+import asyncio
+from pathlib import Path
+import socket
+from threading import Thread
+import typing as t
+
+import pytest
+
+from simphones.inventories import InventoryDataset
+from simphones.query import SimilarityIndex
+from simphones.server import (
+    Client,
+    ServerError,
+    SimilarityServer,
+    start_server,
+)
+
+
+@pytest.fixture
+def server() -> SimilarityServer:
+    """Return server with a small lookup table."""
+    index = SimilarityIndex({
+        ("a", "b"): 0.5,
+        ("a", "c"): 0.25,
+        ("b", "c"): 0.75,
+    })
+    inventories = {"lang1234": {"a": {"a"}, "b": {"b"}}}
+    return SimilarityServer(index, inventories=lambda: inventories)
+
+
+def test_inventories_are_loaded_once() -> None:
+    """Submatrix requests for different languages should share one copy of
+    the inventories.
+    """
+    calls: list[None] = []
+
+    def load() -> InventoryDataset:
+        calls.append(None)
+        return {
+            "lang1234": {"a": {"a"}},
+            "lang5678": {"b": {"b"}, "c": {"c"}},
+        }
+
+    server = SimilarityServer(SimilarityIndex({}), inventories=load)
+    assert not calls
+
+    for language in ("lang1234", "lang5678", "unknown", "lang1234"):
+        server.dispatch({"op": "submatrix", "language": language})
+    assert len(calls) == 1
+    assert server.language_sounds("lang5678") == ["b", "c"]
+    assert not server.language_sounds("unknown")
+
+
+@pytest.fixture
+def loop() -> t.Iterator[asyncio.AbstractEventLoop]:
+    """Run event loop in a background thread."""
+    loop = asyncio.new_event_loop()
+    thread = Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+
+    # Let connection handlers finish before the loop gets closed.
+    async def cancel() -> None:
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(cancel(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_client_over_tcp(
+    server: SimilarityServer,
+    loop: asyncio.AbstractEventLoop,
+) -> None:
+    """Client should get the same answers as the lookup table."""
+    future = asyncio.run_coroutine_threadsafe(start_server(server), loop)
+    port = future.result().sockets[0].getsockname()[1]
+
+    with Client(port=port) as client:
+        assert client.similarity([("b", "a"), ("a", "a"), ("a", "z")]) == [
+            0.5, 1.0, 0.0,
+        ]
+        assert client.most_similar(["c", "z"], k=1) == [[("b", 0.75)], []]
+        assert client.submatrix("lang1234") == (
+            ["a", "b"],
+            [[1.0, 0.5], [0.5, 1.0]],
+        )
+        assert client.submatrix(phones=["c"]) == (["c"], [[1.0]])
+
+        with pytest.raises(ServerError):
+            client.request({"op": "unknown"})
+
+        stats = client.stats()
+        assert stats["requests"] == 5
+        assert stats["items"] == 3 + 2 + 4 + 1
+        assert 0 <= stats["p50"] <= stats["p90"] <= stats["p99"]
+
+
+def test_client_over_unix_socket(
+    server: SimilarityServer,
+    loop: asyncio.AbstractEventLoop,
+    tmp_path: Path,
+) -> None:
+    """The server should also listen on Unix sockets."""
+    path = tmp_path/"simphones.sock"
+    future = asyncio.run_coroutine_threadsafe(
+        start_server(server, path=path),
+        loop,
+    )
+    future.result()
+
+    with Client(path=path) as client:
+        assert client.similarity([("c", "b")]) == [0.75]
+
+
+def test_failed_loader(loop: asyncio.AbstractEventLoop) -> None:
+    """Loader errors should be sent as error responses, without closing the
+    connection.
+    """
+    calls: list[None] = []
+
+    def load() -> InventoryDataset:
+        calls.append(None)
+        raise FileNotFoundError("phoible.csv")
+
+    index = SimilarityIndex({("a", "b"): 0.5})
+    server = SimilarityServer(index, inventories=load)
+    future = asyncio.run_coroutine_threadsafe(start_server(server), loop)
+    port = future.result().sockets[0].getsockname()[1]
+
+    with Client(port=port) as client:
+        for _ in range(2):
+            with pytest.raises(ServerError, match="FileNotFoundError"):
+                client.submatrix("lang1234")
+        assert client.similarity([("a", "b")]) == [0.5]
+    assert len(calls) == 1
+
+
+def test_client_closed_connection() -> None:
+    """The client should raise `ConnectionError` if the server hangs up."""
+    with socket.create_server(("127.0.0.1", 0)) as listener:
+        port = listener.getsockname()[1]
+        with Client(port=port) as client:
+            connection, _ = listener.accept()
+            connection.close()
+            with pytest.raises(ConnectionError):
+                client.stats()
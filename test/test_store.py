@@ -0,0 +1,55 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.store."""
+
+from pathlib import Path
+import typing as t
+
+import numpy as np
+
+from simphones import distances
+from simphones.inventories import get_phonological_inventories
+from simphones.store import (
+    count_allophones,
+    count_cooccurrences,
+    create_allophone_graph,
+    import_phoible,
+    load_inventories,
+    load_store,
+)
+
+
+def test_load_inventories(tmp_path: Path, phoible_sample: Path) -> None:
+    """The store should contain the same inventories as the CSV file."""
+    import_phoible(tmp_path/"store", phoible_sample)
+    store = load_store(tmp_path/"store")
+
+    assert isinstance(store.members, np.memmap)
+    expected = get_phonological_inventories(phoible_sample)
+    result = load_inventories(store)
+    assert result == expected
+    assert list(result) == list(expected)
+
+
+def test_counts(tmp_path: Path, phoible_sample: Path) -> None:
+    """Counting on arrays should give the same counts as on inventories."""
+    store = import_phoible(tmp_path/"store", phoible_sample)
+    inventories = get_phonological_inventories(phoible_sample)
+
+    assert count_allophones(store) == distances.count_allophones(inventories)
+    assert count_cooccurrences(store) == distances.count_cooccurrences(
+        inventories,
+    )
+
+    graph = create_allophone_graph(store)
+    expected = distances.create_allophone_graph(inventories)
+    assert edge_weights(graph) == edge_weights(expected)
+
+
+def edge_weights(graph: t.Any) -> dict[tuple[str, str], float]:
+    """Return edge weights of the graph keyed by sorted phone pairs."""
+    return {
+        distances.unordered(a, b): weight
+        for a, b, weight in graph.edges.data("weight")
+    }
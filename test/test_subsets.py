@@ -0,0 +1,71 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.subsets."""
+
+import pytest
+
+from simphones.distances import compute_distances
+from simphones.inventories import InventoryDataset, LanguageCode
+from simphones.similarity import compute_similarity
+from simphones.subsets import SubsetSimilarity, subset_key
+from tools.synthetic import generate_inventories
+
+
+def filter_inventories(
+    inventories: InventoryDataset,
+    languages: list[LanguageCode],
+) -> InventoryDataset:
+    """Keep languages in the subset, and recompute the combined inventory."""
+    result: InventoryDataset = {"*": {}}
+    for code in languages:
+        result[code] = inventories[code]
+        for phone, allophones in inventories[code].items():
+            result["*"].setdefault(phone, set()).update(allophones)
+    return result
+
+
+def test_subset_similarity_matches_filtered_dataset() -> None:
+    """Subset scores should be the same as the scores of a filtered dataset.
+    """
+    inventories = generate_inventories(languages=40, phones=50, seed=3)
+    languages = [code for code in inventories if code != "*"][::3]
+    subsets = SubsetSimilarity(inventories)
+
+    expected = compute_similarity(
+        compute_distances(filter_inventories(inventories, languages))
+    )
+    actual = subsets.similarity(languages)
+    assert actual.keys() == expected.keys()
+    for pair, score in expected.items():
+        assert actual[pair] == pytest.approx(score)
+
+
+def test_subset_similarity_cache() -> None:
+    """Repeated subsets should be served from the cache, regardless of order.
+    """
+    inventories = generate_inventories(languages=20, phones=30, seed=4)
+    languages = [code for code in inventories if code != "*"]
+    subsets = SubsetSimilarity(inventories, cache_size=1)
+
+    first = subsets.similarity(languages[:10])
+    assert subsets.similarity(reversed(languages[:10])) is first
+    assert subsets.cache.hits == 1
+
+    subsets.similarity(languages[10:])
+    assert subset_key(languages[:10]) not in subsets.cache
+    assert len(subsets.cache) == 1
+
+
+def test_subset_similarity_unknown_language() -> None:
+    """Unknown languages should be rejected."""
+    subsets = SubsetSimilarity(generate_inventories(languages=5, phones=10))
+    with pytest.raises(KeyError):
+        subsets.similarity(["unknown"])
+
+
+def test_subset_similarity_single_language() -> None:
+    """Scores of subsets where every distance is 0 should be rejected."""
+    subsets = SubsetSimilarity(generate_inventories(languages=10, phones=20))
+    with pytest.raises(ValueError):
+        subsets.similarity(["lang0001"])
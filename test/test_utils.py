@@ -4,7 +4,20 @@
 """Test simphones.utils."""
 from pathlib import Path
 
-from simphones.utils import save_as_json
+import pytest
+
+from simphones.query import load_index
+from simphones.utils import (
+    MalformedDataset,
+    OutputJob,
+    read_from_csv,
+    read_from_json,
+    read_manifest,
+    read_shards,
+    save_all,
+    save_as_json,
+    save_as_shards,
+)
 
 
 def test_save_as_json_unicode(tmp_path: Path) -> None:
@@ -21,3 +34,61 @@ def test_save_as_json_unicode(tmp_path: Path) -> None:
     assert "á" in text
     assert "ä" in text
     assert "\\" not in text
+
+
+def test_save_all(tmp_path: Path) -> None:
+    """Every output file should have the same data with its own precision."""
+    example = {
+        ("a", "b"): 0.123456,
+        ("b", "c"): 0.5,
+    }
+    save_all(example, [
+        OutputJob("csv", tmp_path/"out.csv", 2),
+        OutputJob("json", tmp_path/"out.json"),
+    ])
+
+    assert read_from_csv(tmp_path/"out.csv") == {
+        ("a", "b"): 0.12,
+        ("b", "c"): 0.5,
+    }
+    assert read_from_json(tmp_path/"out.json") == example
+
+
+def test_save_as_shards(tmp_path: Path) -> None:
+    """Sharded data should be readable as a whole or one shard at a time."""
+    phones = [f"p{i:02d}" for i in range(20)]
+    example = {
+        (a, b): (i + j) / 40
+        for i, a in enumerate(phones)
+        for j, b in enumerate(phones)
+        if a < b
+    }
+    path = tmp_path/"out"
+    save_as_shards(path, example, shards=3)
+
+    assert read_from_csv(path) == example
+    assert load_index(path).similarity("p01", "p02") == 3 / 40
+
+    manifest = read_manifest(path)
+    mapping = manifest["phones"]
+    assert sum(shard["rows"] for shard in manifest["shards"]) == sum(
+        len({mapping[a], mapping[b]}) for a, b in example
+    )
+
+    # Every pair of a phone should be in the shard of the phone.
+    shard = mapping["p05"]
+    data = read_shards(path, shards=[shard])
+    assert data == {
+        pair: score
+        for pair, score in example.items()
+        if shard in (mapping[pair[0]], mapping[pair[1]])
+    }
+    assert all(pair in data for pair in example if "p05" in pair)
+
+    for index in (-1, 3):
+        with pytest.raises(MalformedDataset):
+            read_shards(path, shards=[index])
+
+    (path/manifest["shards"][shard]["path"]).write_text("", encoding="utf-8")
+    with pytest.raises(MalformedDataset):
+        read_shards(path)
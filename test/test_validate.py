@@ -0,0 +1,76 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Test simphones.validate."""
+
+import networkx as nx   # type: ignore
+
+from simphones.distances import create_allophone_graph, graph_distances
+from simphones.similarity import compute_similarity
+from simphones.validate import Report
+from tools.synthetic import generate_inventories
+
+
+def test_valid_pipeline() -> None:
+    """Data computed from valid inventories should pass every check."""
+    inventories = generate_inventories(languages=20, phones=30)
+    graph = create_allophone_graph(inventories)
+
+    report = Report()
+    report.check_inventories(inventories)
+    report.check_graph(graph)
+    report.check_similarity(compute_similarity(graph_distances(graph)))
+    assert report.ok()
+    assert not str(report)
+
+
+def test_check_inventories() -> None:
+    """Asymmetric allophone sets should be reported."""
+    report = Report()
+    report.check_inventories({
+        "a": {"p": {"p", "b"}, "t": {"t"}},
+        "b": {"k": {"g"}},
+    })
+    assert not report.ok()
+    assert [
+        (violation.check, violation.total, violation.examples)
+        for violation in report.violations
+    ] == [
+        ("phone isn't an allophone of itself", 1, ["b: k"]),
+        ("allophone isn't in inventory", 2, ["a: p ~ b", "b: k ~ g"]),
+    ]
+
+
+def test_check_graph() -> None:
+    """Bad weights, self-loops and isolated nodes should be reported."""
+    graph = nx.Graph()
+    graph.add_edge("a", "b", weight=1.5)
+    graph.add_edge("c", "c", weight=0.5)
+    graph.add_edge("d", "e", weight=float("nan"))
+    graph.add_node("f")
+
+    report = Report()
+    report.check_graph(graph)
+    counts = {
+        violation.check: violation.total for violation in report.violations
+    }
+    assert counts == {
+        "isolated node": 1,
+        "self-loop": 1,
+        "edge weight isn't in [0, 1]": 2,
+    }
+
+
+def test_check_similarity() -> None:
+    """Unordered pairs and scores out of range should be reported."""
+    report = Report(max_examples=1)
+    report.check_similarity({
+        ("a", "b"): 0.5,
+        ("c", "b"): 0.5,
+        ("a", "c"): -0.1,
+        ("d", "d"): 1.0,
+    })
+    assert str(report) == "\n".join([
+        "pair isn't ordered: 1 (c b, ...)",
+        "score isn't in [0, 1]: 1 (a c: -0.1, ...)",
+    ])
@@ -0,0 +1,342 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Guard pipeline performance against a stored baseline.
+
+Runs each stage of the pipeline on a fixed workload, and compares the running
+time and peak memory usage of every stage against a baseline file.
+Exits with a non-zero status if some stage regresses.
+"""
+
+from argparse import ArgumentParser, Namespace
+from json import dumps, loads
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import sys
+import tracemalloc
+import typing as t
+
+from simphones.distances import (
+    compute_distances,
+    count_allophones,
+    count_cooccurrences,
+    create_allophone_graph,
+)
+from simphones.inventories import (
+    InventoryDataset,
+    get_phonological_inventories,
+)
+from simphones.similarity import compute_similarity
+from simphones.utils import save_as_csv, save_as_json
+from tools.synthetic import (
+    add_phoible_argument,
+    generate_segments,
+    write_phoible_csv,
+)
+
+
+Measurement: t.TypeAlias = dict[str, float]
+Results: t.TypeAlias = dict[str, Measurement]
+
+DEFAULT_BASELINE = Path(__file__).with_name("benchmark_baseline.json")
+
+
+class Stage(t.NamedTuple):
+    """Pipeline stage.
+
+    `setup` computes the input of the stage.
+    It doesn't get timed.
+    """
+    name: str
+    setup: t.Callable[[], t.Any]
+    run: t.Callable[[t.Any], t.Any]
+
+
+def create_stages(
+    load: t.Callable[[], InventoryDataset],
+    output: Path,
+) -> list[Stage]:
+    """Create list of pipeline stages.
+
+    Every stage gets its input from a cached run of the previous stages, so
+    that each measurement only includes the cost of a single stage.
+    """
+    cache: dict[str, t.Any] = {}
+
+    def inventories() -> InventoryDataset:
+        if "inventories" not in cache:
+            cache["inventories"] = load()
+        return t.cast(InventoryDataset, cache["inventories"])
+
+    def distances() -> t.Any:
+        if "distances" not in cache:
+            cache["distances"] = compute_distances(inventories())
+        return cache["distances"]
+
+    def similarity() -> t.Any:
+        if "similarity" not in cache:
+            cache["similarity"] = compute_similarity(distances())
+        return cache["similarity"]
+
+    return [
+        Stage("inventories", lambda: None, lambda _: load()),
+        Stage("cooccurrences", inventories, count_cooccurrences),
+        Stage("allophones", inventories, count_allophones),
+        Stage("graph", inventories, create_allophone_graph),
+        Stage("distances", inventories, compute_distances),
+        Stage("similarity", distances, compute_similarity),
+        Stage(
+            "save_as_csv",
+            similarity,
+            lambda data: save_as_csv(output/"out.csv", data),
+        ),
+        Stage(
+            "save_as_json",
+            similarity,
+            lambda data: save_as_json(output/"out.json", data),
+        ),
+    ]
+
+
+def measure(stage: Stage, repeat: int = 3) -> Measurement:
+    """Measure best running time and peak memory usage of the stage.
+
+    Memory is measured in a separate run, because tracing allocations slows
+    down the stage.
+    """
+    data = stage.setup()
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        stage.run(data)
+        best = min(best, perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        stage.run(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": float(peak)}
+
+
+def compare(
+    baseline: Results,
+    results: Results,
+    time_tolerance: float,
+    memory_tolerance: float,
+    min_seconds: float,
+) -> list[str]:
+    """Return names of stages that regressed.
+
+    A stage regresses if it's slower or uses more memory than the baseline by
+    more than the given relative tolerance, or if it's in the baseline but
+    not in the results.
+    Time differences below `min_seconds` are considered noise.
+    """
+    regressions = [name for name in baseline if name not in results]
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+
+        seconds = expected["seconds"]
+        slower = result["seconds"] - seconds
+        if slower > max(seconds * time_tolerance, min_seconds):
+            regressions.append(name)
+            continue
+
+        peak = expected["peak_bytes"]
+        if result["peak_bytes"] > peak * (1 + memory_tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def change(old: float, new: float) -> str:
+    """Format relative change."""
+    if old == 0:
+        return "n/a"
+    return f"{(new - old) / old:+.1%}"
+
+
+def format_table(
+    baseline: Results,
+    results: Results,
+    regressions: list[str],
+) -> str:
+    """Format per-stage diff table."""
+    header = (
+        f"{'stage':<16}{'base s':>10}{'new s':>10}{'diff':>9}"
+        f"{'base MiB':>10}{'new MiB':>10}{'diff':>9}  status"
+    )
+    lines = [header, "-" * len(header)]
+    mib = 2.0 ** 20
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            lines.append(
+                f"{name:<16}{'-':>10}{result['seconds']:>10.4f}{'-':>9}"
+                f"{'-':>10}{result['peak_bytes']/mib:>10.2f}{'-':>9}  new"
+            )
+            continue
+
+        status = "REGRESSED" if name in regressions else "ok"
+        lines.append(
+            f"{name:<16}"
+            f"{expected['seconds']:>10.4f}{result['seconds']:>10.4f}"
+            f"{change(expected['seconds'], result['seconds']):>9}"
+            f"{expected['peak_bytes']/mib:>10.2f}"
+            f"{result['peak_bytes']/mib:>10.2f}"
+            f"{change(expected['peak_bytes'], result['peak_bytes']):>9}"
+            f"  {status}"
+        )
+
+    for name, expected in baseline.items():
+        if name not in results:
+            lines.append(
+                f"{name:<16}{expected['seconds']:>10.4f}{'-':>10}{'-':>9}"
+                f"{expected['peak_bytes']/mib:>10.2f}{'-':>10}{'-':>9}"
+                "  MISSING"
+            )
+    return "\n".join(lines)
+
+
+def workload(args: Namespace) -> dict[str, t.Any]:
+    """Describe the workload, so that baselines aren't compared against runs
+    on different data.
+    """
+    if args.phoible is not None:
+        return {"data": "phoible"}
+    return {
+        "data": "synthetic",
+        "languages": args.languages,
+        "phones": args.phones,
+        "seed": args.seed,
+    }
+
+
+def parse_args() -> Namespace:
+    """Parse command-line arguments."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        dest="baseline",
+        default=DEFAULT_BASELINE,
+        type=Path,
+        help=f"path to baseline file (default: {DEFAULT_BASELINE.name})",
+    )
+    parser.add_argument(
+        "-u",
+        "--update",
+        dest="update",
+        action="store_true",
+        help="overwrite baseline file with new measurements",
+    )
+    add_phoible_argument(parser)
+    parser.add_argument(
+        "--languages",
+        dest="languages",
+        default=300,
+        type=int,
+        help="number of synthetic languages (default: 300)",
+    )
+    parser.add_argument(
+        "--phones",
+        dest="phones",
+        default=300,
+        type=int,
+        help="number of synthetic phones (default: 300)",
+    )
+    parser.add_argument(
+        "--seed",
+        dest="seed",
+        default=0,
+        type=int,
+        help="random seed for synthetic data (default: 0)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        dest="repeat",
+        default=3,
+        type=int,
+        help="number of timed runs per stage (default: 3)",
+    )
+    parser.add_argument(
+        "--time-tolerance",
+        dest="time_tolerance",
+        default=0.5,
+        type=float,
+        help="allowed relative slowdown per stage (default: 0.5)",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        dest="memory_tolerance",
+        default=0.2,
+        type=float,
+        help="allowed relative increase in peak memory (default: 0.2)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        dest="min_seconds",
+        default=0.01,
+        type=float,
+        help="ignore slowdowns smaller than this (default: 0.01)",
+    )
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> int:
+    """Script entrypoint."""
+    results: Results = {}
+    with TemporaryDirectory() as temp:
+        # Synthetic data goes through the same parser as PHOIBLE.
+        phoible = args.phoible
+        if phoible is None:
+            phoible = Path(temp)/"phoible.csv"
+            write_phoible_csv(
+                phoible,
+                generate_segments(
+                    languages=args.languages,
+                    phones=args.phones,
+                    seed=args.seed,
+                ),
+            )
+
+        def load() -> InventoryDataset:
+            return get_phonological_inventories(phoible)
+
+        for stage in create_stages(load, Path(temp)):
+            results[stage.name] = measure(stage, args.repeat)
+
+    if args.update or not args.baseline.exists():
+        data = {"workload": workload(args), "stages": results}
+        args.baseline.write_text(dumps(data, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}.")
+        return 0
+
+    data = loads(args.baseline.read_text())
+    if data["workload"] != workload(args):
+        print("Baseline was recorded on a different workload.")
+        return 2
+
+    baseline = data["stages"]
+    regressions = compare(
+        baseline,
+        results,
+        args.time_tolerance,
+        args.memory_tolerance,
+        args.min_seconds,
+    )
+    print(format_table(baseline, results, regressions))
+    if regressions:
+        print(f"\nRegressed stages: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
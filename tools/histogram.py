@@ -4,11 +4,154 @@
 """Draw histogram of similarity scores."""
 
 from argparse import ArgumentParser, Namespace
+from csv import reader
+import gzip
+from itertools import islice
+from json import dumps
 from pathlib import Path
+import typing as t
 
-import matplotlib.pyplot as plt     # type: ignore
+import numpy as np
+import numpy.typing as npt
 
-from simphones.utils import read_from_csv
+from simphones.utils import MalformedDataset, read_from_csv
+
+
+Row: t.TypeAlias = list[str]
+
+
+class PhoneSummary(t.NamedTuple):
+    """Summary of the scores of a phone."""
+    frequency: int
+    total: float
+    minimum: float
+    maximum: float
+
+    def merge(self, other: "PhoneSummary") -> "PhoneSummary":
+        """Combine summaries."""
+        return PhoneSummary(
+            self.frequency + other.frequency,
+            self.total + other.total,
+            min(self.minimum, other.minimum),
+            max(self.maximum, other.maximum),
+        )
+
+
+class ScoreStats:
+    """Statistics of similarity scores in bounded memory.
+
+    Scores are counted in `bins` equal-width bins over [0, 1].
+    Quantiles are estimated from a finer histogram with `resolution` bins,
+    so their error is at most `1 / resolution`.
+    Since scores are bounded, this is simpler than a t-digest, and it's just
+    as compact.
+    Memory use only grows with the number of distinct phones.
+    """
+
+    def __init__(self, bins: int = 10, resolution: int = 10_000) -> None:
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.fine = np.zeros(resolution, dtype=np.int64)
+        self.phones: dict[str, PhoneSummary] = {}
+
+    def update(self, rows: list[Row]) -> None:
+        """Include chunk of CSV rows.
+
+        May raise `MalformedDataset`.
+        """
+        if any(len(row) != 3 for row in rows):
+            raise MalformedDataset
+        try:
+            scores = np.array([row[2] for row in rows], dtype=np.float64)
+        except ValueError as exc:
+            raise MalformedDataset from exc
+
+        self.counts += bin_counts(scores, len(self.counts))
+        self.fine += bin_counts(scores, len(self.fine))
+
+        # Summarize the chunk per phone, then merge into the totals.
+        phones = [row[0] for row in rows] + [row[1] for row in rows]
+        values = np.concatenate([scores, scores])
+        unique, inverse = np.unique(phones, return_inverse=True)
+        minima = np.full(len(unique), np.inf)
+        maxima = np.full(len(unique), -np.inf)
+        np.minimum.at(minima, inverse, values)
+        np.maximum.at(maxima, inverse, values)
+        summaries = zip(
+            unique.tolist(),
+            np.bincount(inverse).tolist(),
+            np.bincount(inverse, weights=values).tolist(),
+            minima.tolist(),
+            maxima.tolist(),
+        )
+        for phone, *summary in summaries:
+            new = PhoneSummary(*summary)
+            old = self.phones.get(phone)
+            self.phones[phone] = new if old is None else old.merge(new)
+
+    def quantile(self, q: float) -> float:
+        """Estimate quantile (0 <= q <= 1) of the scores."""
+        cumulative = np.cumsum(self.fine)
+        if cumulative[-1] == 0:
+            return float("nan")
+        index = np.searchsorted(cumulative, q * cumulative[-1])
+        return float((index + 0.5) / len(self.fine))
+
+    def summary(self) -> dict[str, t.Any]:
+        """Summarize statistics as JSON-serializable object."""
+        edges = np.linspace(0, 1, len(self.counts) + 1)
+        return {
+            "count": int(self.counts.sum()),
+            "histogram": {
+                "edges": edges.tolist(),
+                "counts": self.counts.tolist(),
+            },
+            "quantiles": {
+                str(q): self.quantile(q)
+                for q in (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+            },
+            "phones": {
+                phone: {
+                    "count": value.frequency,
+                    "mean": value.total / value.frequency,
+                    "min": value.minimum,
+                    "max": value.maximum,
+                }
+                for phone, value in sorted(self.phones.items())
+            },
+        }
+
+
+def bin_counts(
+    scores: npt.NDArray[np.float64],
+    bins: int,
+) -> npt.NDArray[np.int64]:
+    """Count scores in equal-width bins over [0, 1]."""
+    indices = np.clip((scores * bins).astype(np.int64), 0, bins - 1)
+    return np.bincount(indices, minlength=bins)
+
+
+def read_chunks(path: Path, size: int = 65536) -> t.Iterator[list[Row]]:
+    """Read rows of CSV file (optionally gzipped) in chunks."""
+    opener: t.Callable[..., t.IO[str]] = open
+    if path.suffix == ".gz":
+        opener = gzip.open
+    with opener(path, "rt", encoding="utf-8", newline="") as file:
+        rows = reader(file)
+        while chunk := list(islice(rows, size)):
+            yield chunk
+
+
+def compute_stats(
+    path: Path,
+    bins: int = 10,
+    chunk_size: int = 65536,
+) -> ScoreStats:
+    """Compute score statistics of output file without loading all of it."""
+    stats = ScoreStats(bins)
+    for chunk in read_chunks(path, chunk_size):
+        stats.update(chunk)
+    return stats
 
 
 def parse_args() -> Namespace:
@@ -22,6 +165,30 @@ def parse_args() -> Namespace:
         type=int,
         help="number of bins in histogram (default: 10)",
     )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        dest="stream",
+        action="store_true",
+        help=(
+            "read scores in chunks and compute statistics in bounded memory"
+            " (also supports .csv.gz files)"
+        ),
+    )
+    parser.add_argument(
+        "--json",
+        dest="json",
+        default=None,
+        type=Path,
+        help="save statistics as JSON (implies --stream)",
+    )
+    parser.add_argument(
+        "--png",
+        dest="png",
+        default=None,
+        type=Path,
+        help="save histogram as PNG instead of showing it (implies --stream)",
+    )
     parser.add_argument(
         "data",
         type=Path,
@@ -32,10 +199,29 @@ def parse_args() -> Namespace:
 
 def main(args: Namespace) -> None:
     """Script entrypoint."""
-    data = read_from_csv(args.data).values()
+    streaming = args.stream or args.json is not None or args.png is not None
+    if streaming:
+        summary = compute_stats(args.data, args.bins).summary()
+        if args.json is not None:
+            text = dumps(summary, ensure_ascii=False, indent=2)
+            args.json.write_text(text, encoding="utf-8")
+            if args.png is None:
+                return
+
+    # pylint: disable-next=import-outside-toplevel
+    import matplotlib.pyplot as plt     # type: ignore
+
+    if streaming:
+        histogram = summary["histogram"]
+        plt.stairs(histogram["counts"], histogram["edges"], fill=True)
+    else:
+        data = read_from_csv(args.data).values()
+        plt.hist(data, bins=args.bins)
 
-    plt.hist(data, bins=args.bins)
-    plt.show()
+    if args.png is not None:
+        plt.savefig(args.png)
+    else:
+        plt.show()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Compare landmark-approximated distances against exact distances."""
+
+from argparse import ArgumentParser, Namespace
+from time import perf_counter
+import typing as t
+
+from simphones.distances import (
+    DistanceData,
+    create_allophone_graph,
+    graph_distances,
+)
+from simphones.inventories import get_phonological_inventories
+from tools.synthetic import add_phoible_argument, generate_inventories
+
+if t.TYPE_CHECKING:
+    import networkx as nx   # type: ignore
+
+
+def timed_distances(
+    graph: "nx.Graph",
+    landmarks: int | None,
+    candidates: int,
+) -> tuple[DistanceData, float]:
+    """Compute distances on a copy of the graph, and measure the time."""
+    graph = graph.copy()
+    start = perf_counter()
+    distances = graph_distances(graph, landmarks, candidates)
+    return distances, perf_counter() - start
+
+
+def nearest(distances: DistanceData, k: int) -> dict[str, set[str]]:
+    """Return the `k` nearest neighbors of each phone."""
+    neighbors: dict[str, list[tuple[float, str]]] = {}
+    for (a, b), distance in distances.items():
+        if a != b:
+            neighbors.setdefault(a, []).append((distance, b))
+            neighbors.setdefault(b, []).append((distance, a))
+    return {
+        phone: {neighbor for _, neighbor in sorted(values)[:k]}
+        for phone, values in neighbors.items()
+    }
+
+
+def accuracy(
+    exact: DistanceData,
+    approximate: DistanceData,
+    k: int,
+) -> dict[str, float]:
+    """Compare approximate distances against exact distances."""
+    errors = [
+        (approximate[pair] - distance) / distance
+        for pair, distance in exact.items()
+        if distance > 0
+    ]
+    expected = nearest(exact, k)
+    actual = nearest(approximate, k)
+    hits = sum(len(expected[phone] & actual[phone]) for phone in expected)
+    total = sum(len(values) for values in expected.values())
+    return {
+        "exact": sum(1 for error in errors if error < 1e-9) / len(errors),
+        "mean": sum(errors) / len(errors),
+        "max": max(errors),
+        "recall": hits / total,
+    }
+
+
+def parse_args() -> Namespace:
+    """Parse command-line arguments."""
+    parser = ArgumentParser(description=__doc__)
+    add_phoible_argument(parser)
+    parser.add_argument(
+        "-L",
+        dest="landmarks",
+        action="append",
+        type=int,
+        help="number of landmarks (can be repeated, default: 4, 16, 64)",
+    )
+    parser.add_argument(
+        "-k",
+        dest="candidates",
+        default=10,
+        type=int,
+        help="number of refined neighbors per phone (default: 10)",
+    )
+    parser.add_argument(
+        "--phones",
+        dest="phones",
+        default=1000,
+        type=int,
+        help="number of distinct synthetic phones (default: 1000)",
+    )
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    """Script entrypoint."""
+    if args.phoible is not None:
+        inventories = get_phonological_inventories(args.phoible)
+    else:
+        inventories = generate_inventories(languages=1000, phones=args.phones)
+    graph = create_allophone_graph(inventories)
+
+    exact, baseline = timed_distances(graph, None, args.candidates)
+    print(f"exact: {baseline:.2f}s")
+    print("landmarks,seconds,speedup,exact,mean error,max error,recall")
+    for landmarks in args.landmarks or [4, 16, 64]:
+        approximate, elapsed = timed_distances(
+            graph,
+            landmarks,
+            args.candidates,
+        )
+        stats = accuracy(exact, approximate, args.candidates)
+        print(
+            f"{landmarks},{elapsed:.2f},{baseline / elapsed:.1f}x,"
+            f"{stats['exact']:.3f},{stats['mean']:.4f},{stats['max']:.4f},"
+            f"{stats['recall']:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,114 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Generate synthetic phonological inventories."""
+
+from argparse import ArgumentParser
+from csv import writer
+from pathlib import Path
+from random import Random
+import typing as t
+
+from simphones.inventories import (
+    AllophoneSet,
+    InventoryDataset,
+    LanguageCode,
+    Phone,
+    update_inventory,
+)
+
+
+def generate_segments(
+    languages: int = 200,
+    phones: int = 150,
+    inventory_size: int = 30,
+    allophone_rate: float = 0.3,
+    seed: int = 0,
+) -> t.Iterator[tuple[LanguageCode, Phone, AllophoneSet]]:
+    """Generate random (language code, phoneme, allophones) rows, like
+    `simphones.inventories.read_segments`.
+
+    See `generate_inventories` for the arguments.
+    """
+    rng = Random(seed)
+    pool = [f"p{i:04d}" for i in range(phones)]
+    size = min(inventory_size, phones)
+
+    for index in range(languages):
+        for phoneme in rng.sample(pool, size):
+            allophones = set()
+            if rng.random() < allophone_rate:
+                allophones.add(rng.choice(pool))
+            yield f"lang{index:04d}", phoneme, allophones
+
+
+def generate_inventories(
+    languages: int = 200,
+    phones: int = 150,
+    inventory_size: int = 30,
+    allophone_rate: float = 0.3,
+    seed: int = 0,
+) -> InventoryDataset:
+    """Generate a random dataset that looks like PHOIBLE inventories.
+
+    Each language gets `inventory_size` phones out of a pool of `phones`
+    phones.
+    Each phoneme gets an allophone with probability `allophone_rate`.
+    Like `get_phonological_inventories`, the result includes a combined "*"
+    inventory.
+    The output only depends on the arguments.
+    """
+    inventories: InventoryDataset = {"*": {}}
+    for code, phoneme, allophones in generate_segments(
+        languages,
+        phones,
+        inventory_size,
+        allophone_rate,
+        seed,
+    ):
+        inventory = inventories.setdefault(code, {})
+        update_inventory(inventory, phoneme, allophones)
+        update_inventory(inventories["*"], phoneme, allophones)
+    return inventories
+
+
+def write_phoible_csv(
+    path: Path,
+    segments: t.Iterable[tuple[LanguageCode, Phone, AllophoneSet]],
+) -> None:
+    """Write rows from `generate_segments` in the same format as PHOIBLE.
+
+    `get_phonological_inventories(path)` returns the same dataset as
+    `generate_inventories` with the same arguments.
+    """
+    header = [
+        "InventoryID", "Glottocode", "ISO6393", "LanguageName",
+        "SpecificDialect", "GlyphID", "Phoneme", "Allophones",
+    ]
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        csv_file = writer(file)
+        csv_file.writerow(header)
+        for code, phoneme, allophones in segments:
+            field = " ".join([phoneme, *sorted(allophones)])
+            csv_file.writerow(
+                [code, code, "NA", code, "NA", "0", phoneme, field]
+            )
+
+
+def add_phoible_argument(parser: ArgumentParser) -> None:
+    """Add option for using real PHOIBLE data instead of synthetic data."""
+    parser.add_argument(
+        "--phoible",
+        dest="phoible",
+        default=None,
+        type=Path,
+        help="run on PHOIBLE CSV file instead of synthetic data",
+    )
+
+
+__all__ = [
+    "add_phoible_argument",
+    "generate_inventories",
+    "generate_segments",
+    "write_phoible_csv",
+]
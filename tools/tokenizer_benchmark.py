@@ -0,0 +1,104 @@
+# Copyright 2023 Levi Gruspe
+# Licensed under GNU GPLv3 or later
+# See https://www.gnu.org/licenses/gpl-3.0.en.html
+"""Measure throughput of the IPA tokenizer.
+
+Without `--phoible`, the phones are random combinations of IPA letters and
+modifiers.
+The rate with the word cache mostly measures cache hits, since the
+transcriptions only have `--vocabulary` distinct words; the rate without the
+cache is the cost of segmenting new words.
+"""
+
+from argparse import ArgumentParser, Namespace
+from random import Random
+from time import perf_counter
+
+from simphones.inventories import get_phonological_inventories
+from simphones.normalize import normalize_ipa
+from simphones.segmentation import Tokenizer
+from tools.synthetic import add_phoible_argument
+
+
+IPA_LETTERS = (
+    "pbtdʈɖcɟkɡqɢʔmɱnɳɲŋɴʙrʀⱱɾɽɸβfvθðszʃʒʂʐçʝxɣχʁħʕhɦɬɮʋɹɻjɰlɭʎʟ"
+    "iyɨʉɯuɪʏʊeøɘɵɤoəɛœɜɞʌɔæɐaɶɑɒ"
+)
+IPA_MODIFIERS = "ʰʷʲˠˤʼːˑ\u0303\u0325\u032a\u0330\u031a\u0329"
+
+
+def generate_phones(count: int = 2000, seed: int = 0) -> list[str]:
+    """Generate distinct IPA phones with up to three modifiers."""
+    rng = Random(seed)
+    phones = set(IPA_LETTERS)
+    while len(phones) < count:
+        modifiers = rng.sample(IPA_MODIFIERS, rng.randint(1, 3))
+        phones.add(normalize_ipa(rng.choice(IPA_LETTERS) + "".join(modifiers)))
+    return sorted(phones)
+
+
+def generate_transcriptions(
+    phones: list[str],
+    count: int,
+    words: int = 8,
+    vocabulary: int = 5000,
+    seed: int = 0,
+) -> list[str]:
+    """Generate random transcriptions made up of words from a fixed
+    vocabulary, like in a real corpus.
+    """
+    rng = Random(seed)
+    lexicon = [
+        "".join(rng.choices(phones, k=rng.randint(2, 8)))
+        for _ in range(vocabulary)
+    ]
+    return [" ".join(rng.choices(lexicon, k=words)) for _ in range(count)]
+
+
+def parse_args() -> Namespace:
+    """Parse command-line arguments."""
+    parser = ArgumentParser(description=__doc__)
+    add_phoible_argument(parser)
+    parser.add_argument(
+        "-c",
+        "--count",
+        dest="count",
+        default=100_000,
+        type=int,
+        help="number of transcriptions (default: 100000)",
+    )
+    parser.add_argument(
+        "--vocabulary",
+        dest="vocabulary",
+        default=5000,
+        type=int,
+        help="number of distinct words (default: 5000)",
+    )
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> None:
+    """Script entrypoint."""
+    if args.phoible is not None:
+        phones = sorted(get_phonological_inventories(args.phoible)["*"])
+    else:
+        phones = generate_phones()
+    texts = generate_transcriptions(
+        phones,
+        args.count,
+        vocabulary=args.vocabulary,
+    )
+
+    for cache_size in (0, 100_000):
+        tokenizer = Tokenizer(phones, cache_size=cache_size)
+        start = perf_counter()
+        tokens = sum(map(len, tokenizer.tokenize_many(texts)))
+        elapsed = perf_counter() - start
+
+        rate = tokens / elapsed / 1e6
+        label = "with word cache" if cache_size else "without word cache"
+        print(f"{label}: {tokens} tokens in {elapsed:.2f}s ({rate:.2f}M/s)")
+
+
+if __name__ == "__main__":
+    main(parse_args())